@@ -7,9 +7,23 @@ class DocumentStatus(Enum):
     GENERATING_SUMMARY = "generating_summary"
     SUMMARY_GENERATED = "summary_generated"
     EMBEDDING_TEXT = "embedding_text"
+    EMBEDDING_QUEUED = "embedding_queued"
     EMBEDDED_TEXT = "embedded_text"
     COMPLETED = "completed"
 
 class MarkdownConverter(Enum):
     MARKER = "marker"
     MARKITDOWN = "markitdown"
+    AUTO = "auto"
+
+class StageStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    QUEUED = "queued"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class OllamaPriority(Enum):
+    INTERACTIVE = 0
+    EMBEDDING = 1
+    SUMMARY = 2
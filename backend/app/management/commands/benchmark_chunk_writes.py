@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import Document, DocumentChunk
+from app.utils.bulk_copy import copy_chunks, copy_embeddings
+
+
+class Command(BaseCommand):
+    help = 'Compare the ORM and COPY write paths for document chunks and their vectors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunks', type=int, default=2000, help="number of chunks to write")
+        parser.add_argument('--repeat', type=int, default=3, help="runs per write path")
+
+    def handle(self, *args, **options):
+        no_of_chunks = options["chunks"]
+        contents = [f"Benchmark chunk {index} " + "lorem ipsum " * 80 for index in range(no_of_chunks)]
+        vectors = [[random.random() for _ in range(1024)] for _ in range(no_of_chunks)]
+
+        paths = {"orm": self.write_with_orm, "copy": self.write_with_copy}
+        for name, write in paths.items():
+            insert_times, update_times = [], []
+            for _ in range(options["repeat"]):
+                insert_seconds, update_seconds = self.run(write, contents, vectors)
+                insert_times.append(insert_seconds)
+                update_times.append(update_seconds)
+
+            self.stdout.write(
+                f"{name:>4}: insert {min(insert_times):.3f}s, "
+                f"vectors {min(update_times):.3f}s "
+                f"(best of {options['repeat']}, {no_of_chunks} chunks)"
+            )
+
+    def run(self, write, contents, vectors):
+        # Everything is rolled back, so the benchmark leaves no rows behind
+        with transaction.atomic():
+            document = Document.objects.create(title="Chunk write benchmark")
+            timings = write(document, contents, vectors)
+            transaction.set_rollback(True)
+        return timings
+
+    def write_with_orm(self, document, contents, vectors):
+        start = time.perf_counter()
+        chunks = DocumentChunk.objects.bulk_create(
+            [DocumentChunk(document=document, content=content, index=index) for index, content in enumerate(contents)],
+            batch_size=1000,
+        )
+        insert_seconds = time.perf_counter() - start
+
+        for chunk, vector in zip(chunks, vectors):
+            chunk.embedding_vector = vector
+        start = time.perf_counter()
+        DocumentChunk.objects.bulk_update(chunks, ["embedding_vector"])
+        return insert_seconds, time.perf_counter() - start
+
+    def write_with_copy(self, document, contents, vectors):
+        start = time.perf_counter()
+        copy_chunks([DocumentChunk(document=document, content=content, index=index) for index, content in enumerate(contents)])
+        insert_seconds = time.perf_counter() - start
+
+        chunks = list(DocumentChunk.objects.filter(document=document).order_by('index').only('id'))
+        for chunk, vector in zip(chunks, vectors):
+            chunk.embedding_vector = vector
+        start = time.perf_counter()
+        copy_embeddings(chunks)
+        return insert_seconds, time.perf_counter() - start
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.utils.vector_index import (build_vector_index, drop_vector_index,
+                                    get_vector_index_state)
+
+
+class Command(BaseCommand):
+    help = 'Switch bulk-ingest mode, which drops the HNSW vector index during large backfills and rebuilds it afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', choices=['on', 'off', 'status'], help="on drops the index, off rebuilds it")
+        parser.add_argument(
+            '--maintenance-work-mem', default=settings.VECTOR_INDEX_MAINTENANCE_WORK_MEM,
+            help="maintenance_work_mem used while rebuilding the index"
+        )
+        parser.add_argument(
+            '--parallel-workers', type=int, default=settings.VECTOR_INDEX_PARALLEL_WORKERS,
+            help="max_parallel_maintenance_workers used while rebuilding the index"
+        )
+
+    def handle(self, *args, **options):
+        mode = options["mode"]
+
+        if mode == "on":
+            drop_vector_index()
+            self.stdout.write(self.style.WARNING(
+                "Bulk-ingest mode on: vector index dropped, searches use an exact scan until it is rebuilt"
+            ))
+        elif mode == "off":
+            self.stdout.write("Rebuilding vector index concurrently...")
+            start = time.perf_counter()
+            build_vector_index(options["maintenance_work_mem"], options["parallel_workers"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Bulk-ingest mode off: vector index rebuilt in {time.perf_counter() - start:.1f}s"
+            ))
+
+        self.stdout.write(f"Vector index: {get_vector_index_state()}")
@@ -0,0 +1,131 @@
+import fnmatch
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from app.constant import DocumentStatus
+from app.models import Document
+from app.tasks.tasks import start_document_processing
+from app.utils.upload import UploadUtils
+
+
+class Command(BaseCommand):
+    help = 'Ingest every matching file under a directory, dispatching the pipelines in waves'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="directory to walk")
+        parser.add_argument('--pattern', action='append', help="filename glob to include, may be repeated (default: *.pdf)")
+        parser.add_argument('--converter', default='auto', help="markdown converter for the new documents")
+        parser.add_argument('--copy', action='store_true', help="copy files instead of hard-linking them")
+        parser.add_argument('--batch-size', type=int, default=500, help="rows per bulk insert/update")
+        parser.add_argument('--max-in-flight', type=int, default=20, help="documents processing at the same time")
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="seconds between progress checks")
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(options["directory"])
+        if not os.path.isdir(root):
+            raise CommandError(f"{root} is not a directory")
+
+        paths = self.find_files(root, options["pattern"] or ["*.pdf"])
+        self.stdout.write(f"Found {len(paths)} files under {root}")
+
+        self.create_documents(paths, options["converter"], options["batch_size"])
+        self.place_files(paths, not options["copy"], options["batch_size"])
+        self.dispatch_in_waves(paths, options["max_in_flight"], options["poll_interval"])
+
+    def find_files(self, root, patterns):
+        paths = []
+        for directory, _, file_names in os.walk(root):
+            for file_name in file_names:
+                if any(fnmatch.fnmatch(file_name.lower(), pattern.lower()) for pattern in patterns):
+                    paths.append(os.path.join(directory, file_name))
+        return sorted(paths)
+
+    def get_documents(self, paths, batch_size):
+        """Yields the documents created from the given paths, in batches."""
+        for start in range(0, len(paths), batch_size):
+            yield from Document.objects.filter(source_path__in=paths[start:start + batch_size]).order_by('id')
+
+    def create_documents(self, paths, converter, batch_size):
+        # Paths recorded by an earlier run are skipped, which makes the command resumable
+        existing = {document.source_path for document in self.get_documents(paths, batch_size)}
+        new_paths = [path for path in paths if path not in existing]
+
+        Document.objects.bulk_create(
+            [
+                Document(title=os.path.basename(path), source_path=path, markdown_converter=converter)
+                for path in new_paths
+            ],
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"Created {len(new_paths)} documents ({len(existing)} already ingested)")
+
+    def place_files(self, paths, link, batch_size):
+        pending = [document for document in self.get_documents(paths, batch_size) if not document.file]
+        start = time.perf_counter()
+
+        placed = []
+        for index, document in enumerate(pending, start=1):
+            try:
+                document.file, document.file_hash = UploadUtils.import_document(document.source_path, document.id, link=link)
+            except OSError as e:
+                self.stderr.write(f"Could not import {document.source_path}: {e}")
+                continue
+            placed.append(document)
+
+            if len(placed) >= batch_size or index == len(pending):
+                Document.objects.bulk_update(placed, ["file", "file_hash"])
+                placed = []
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"Stored {index}/{len(pending)} files ({index / elapsed:.1f} files/s)")
+
+        if placed:
+            Document.objects.bulk_update(placed, ["file", "file_hash"])
+
+    def dispatch_in_waves(self, paths, max_in_flight, poll_interval):
+        documents = list(self.get_documents(paths, 1000))
+        ids = [document.id for document in documents]
+        queue = [document for document in documents if document.file and not document.task_id]
+        total = len(queue)
+        self.stdout.write(f"Dispatching {total} documents, at most {max_in_flight} at a time")
+
+        start = time.perf_counter()
+        finished_before = self.count_finished(ids)
+        while True:
+            in_flight = (
+                Document.objects.filter(id__in=ids, task_id__isnull=False, is_failed=False)
+                .exclude(status=DocumentStatus.COMPLETED.value)
+                .count()
+            )
+
+            wave = queue[:max(max_in_flight - in_flight, 0)]
+            queue = queue[len(wave):]
+            for document in wave:
+                result = start_document_processing(document)
+                document.task_id = result.id
+            if wave:
+                Document.objects.bulk_update(wave, ["task_id"])
+                in_flight += len(wave)
+
+            finished = self.count_finished(ids) - finished_before
+            elapsed = time.perf_counter() - start
+            throughput = finished / elapsed * 60 if elapsed else 0
+            self.stdout.write(
+                f"Dispatched {total - len(queue)}/{total}, in flight {in_flight}, "
+                f"finished {finished} ({throughput:.1f} documents/min)"
+            )
+
+            if not queue and not in_flight:
+                break
+            time.sleep(poll_interval)
+
+        self.stdout.write(self.style.SUCCESS(f"Ingested {total} documents in {time.perf_counter() - start:.0f}s"))
+
+    def count_finished(self, ids):
+        return (
+            Document.objects.filter(id__in=ids)
+            .filter(Q(status=DocumentStatus.COMPLETED.value) | Q(is_failed=True))
+            .count()
+        )
@@ -1,10 +1,45 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.core.management import call_command
 import os
 
 class Command(BaseCommand):
     help = 'Run Celery worker'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stage',
+            choices=['extraction', 'embedding', 'summary'],
+            help="only consume this stage's queue, with a pool suited to it (default: every queue on one gevent worker)",
+        )
+
     def handle(self, *args, **kwargs):
         os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inteldocs.settings')
-        call_command('celery', 'worker', '--pool=gevent', '-l', 'info')
+        from inteldocs.celery import app
+
+        # Queues and pool sizes come from settings, so overriding them through
+        # the environment changes the routes and the consuming workers together
+        stage = kwargs['stage']
+        if stage == 'extraction':
+            argv = [
+                '--pool=prefork',
+                '-Q', settings.EXTRACTION_QUEUE,
+                f'--autoscale={settings.EXTRACTION_WORKER_CONCURRENCY},1',
+                f'--max-memory-per-child={settings.EXTRACTION_WORKER_MAX_MEMORY_PER_CHILD}',
+            ]
+        elif stage == 'embedding':
+            argv = [
+                '--pool=threads',
+                '-Q', settings.EMBEDDING_QUEUE,
+                f'--concurrency={settings.EMBEDDING_WORKER_CONCURRENCY}',
+            ]
+        elif stage == 'summary':
+            argv = [
+                '--pool=threads',
+                '-Q', settings.SUMMARY_QUEUE,
+                f'--concurrency={settings.SUMMARY_WORKER_CONCURRENCY}',
+            ]
+        else:
+            queues = ['celery', settings.EXTRACTION_QUEUE, settings.EMBEDDING_QUEUE, settings.SUMMARY_QUEUE]
+            argv = ['--pool=gevent', '-Q', ','.join(queues)]
+
+        app.worker_main(argv=['worker', '-l', 'info', *argv])
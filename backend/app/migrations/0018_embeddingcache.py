@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:40
+
+import pgvector.django
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_document_file_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=255)),
+                ('text_hash', models.CharField(max_length=64)),
+                ('embedding_vector', pgvector.django.VectorField(dimensions=1024)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='app_embeddi_last_us_6de0c9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'text_hash'), name='unique_embedding_cache_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+def mark_completed_stages(apps, schema_editor):
+    Document = apps.get_model('app', 'Document')
+    Document.objects.filter(status='completed').update(
+        summary_status='completed',
+        embedding_status='completed',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_embeddingcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='summary_status',
+            field=models.CharField(default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='embedding_status',
+            field=models.CharField(default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_completed_stages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_document_summary_status_document_embedding_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='no_of_pages',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='no_of_pages_processed',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_generationcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='boilerplate_chars_removed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='boilerplate_chunks_saved',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_documentchunk_minhash_lsh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='source_path',
+            field=models.CharField(blank=True, db_index=True, max_length=2000, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_document_source_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='estimated_cost',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='priority',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
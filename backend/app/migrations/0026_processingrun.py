@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_document_estimated_cost_document_priority'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=20)),
+                ('status', models.CharField(default='running', max_length=20)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('worker', models.CharField(blank=True, max_length=255, null=True)),
+                ('converter', models.CharField(blank=True, max_length=100, null=True)),
+                ('no_of_pages', models.IntegerField(default=0)),
+                ('no_of_chunks', models.IntegerField(default=0)),
+                ('bytes_processed', models.BigIntegerField(default=0)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='processing_runs', to='app.document')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stage', 'status', 'finished_at'], name='app_process_stage_b4420f_idx')],
+            },
+        ),
+    ]
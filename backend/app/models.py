@@ -1,7 +1,9 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from pgvector.django import HnswIndex, VectorField
 
-from .constant import DocumentStatus
+from .constant import DocumentStatus, StageStatus
 
 
 class Document(models.Model):
@@ -9,11 +11,21 @@ class Document(models.Model):
     description = models.TextField(null=True, blank=True)
     file = models.CharField(max_length=1000, null=True, blank=True)
     ocr_file = models.CharField(max_length=1000, null=True, blank=True)
+    file_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    source_path = models.CharField(max_length=2000, null=True, blank=True, db_index=True)
     status = models.CharField(max_length=100, default=DocumentStatus.PENDING)
     is_failed = models.BooleanField(default=False)
+    summary_status = models.CharField(max_length=20, default=StageStatus.PENDING.value)
+    embedding_status = models.CharField(max_length=20, default=StageStatus.PENDING.value)
     task_id = models.CharField(max_length=255, null=True, blank=True)
     markdown_converter = models.CharField(max_length=100, null=True, blank=True)
     no_of_chunks = models.IntegerField(default=0)
+    no_of_pages = models.IntegerField(default=0)
+    no_of_pages_processed = models.IntegerField(default=0)
+    estimated_cost = models.FloatField(null=True, blank=True)
+    priority = models.IntegerField(null=True, blank=True)
+    boilerplate_chars_removed = models.IntegerField(default=0)
+    boilerplate_chunks_saved = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -31,6 +43,9 @@ class DocumentChunk(models.Model):
     index = models.IntegerField()
     content = models.TextField()
     embedding_vector = VectorField(dimensions=1024, editable=False, null=True, blank=True)
+    minhash = ArrayField(models.BigIntegerField(), null=True, blank=True)
+    lsh_bands = ArrayField(models.BigIntegerField(), null=True, blank=True)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -46,4 +61,57 @@ class DocumentChunk(models.Model):
                 ef_construction=128,
                 opclasses=['vector_cosine_ops'],
             ),
+            GinIndex(name='chunk_lsh_bands_index', fields=['lsh_bands']),
+        ]
+
+class EmbeddingCache(models.Model):
+    model = models.CharField(max_length=255)
+    text_hash = models.CharField(max_length=64)
+    embedding_vector = VectorField(dimensions=1024)
+    last_used_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model}:{self.text_hash}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'text_hash'], name='unique_embedding_cache_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+
+class GenerationCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=255)
+    prompt_version = models.CharField(max_length=50)
+    output = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model}:{self.prompt_version}:{self.key}"
+
+class ProcessingRun(models.Model):
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True, related_name='processing_runs')
+    stage = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, default=StageStatus.RUNNING.value)
+    task_id = models.CharField(max_length=255, null=True, blank=True)
+    worker = models.CharField(max_length=255, null=True, blank=True)
+    converter = models.CharField(max_length=100, null=True, blank=True)
+    no_of_pages = models.IntegerField(default=0)
+    no_of_chunks = models.IntegerField(default=0)
+    bytes_processed = models.BigIntegerField(default=0)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.stage} run of Document {self.document_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stage', 'status', 'finished_at']),
         ]
@@ -0,0 +1,55 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MARKER_CONFIG = {
+    "output_format": "markdown",
+    "disable_multiprocessing": False,
+    "disable_image_extraction": True,
+    # Page separators let boilerplate removal compare pages
+    "paginate_output": True,
+}
+
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def load_pdf_converter():
+    """
+    Return the process-wide Marker PdfConverter, loading the models on first use.
+
+    The layout/OCR weights are loaded once per process and reused by every
+    conversion that follows. When the models are loaded in the Celery parent
+    before the pool forks, the children inherit them copy-on-write.
+    """
+    global _converter
+
+    if _converter is not None:
+        return _converter
+
+    with _converter_lock:
+        if _converter is None:
+            from marker.config.parser import ConfigParser
+            from marker.converters.pdf import PdfConverter
+            from marker.models import create_model_dict
+
+            os.environ['PYTORCH_MPS_HIGH_WATERMARK_RATIO'] = '0.0'
+
+            start = time.perf_counter()
+            config_parser = ConfigParser(MARKER_CONFIG)
+            _converter = PdfConverter(
+                config=config_parser.generate_config_dict(),
+                artifact_dict=create_model_dict(),
+                processor_list=config_parser.get_processors(),
+                renderer=config_parser.get_renderer()
+            )
+            logger.info(f"Marker models loaded in {time.perf_counter() - start:.2f}s (pid {os.getpid()})")
+
+    return _converter
+
+
+def is_pdf_converter_loaded() -> bool:
+    return _converter is not None
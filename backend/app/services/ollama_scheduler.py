@@ -0,0 +1,146 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from ..constant import OllamaPriority
+from ..utils.stats import get_percentile
+from .redis import REDIS_CLIENT
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "ollama:metrics"
+RECENT_WAITS = 1000
+
+# Waiters are ordered by priority, then arrival. A waiter takes a slot once
+# fewer slots are held than the model's limit and it is among the first
+# waiters that fit. Holders expire with their lease and waiters that stopped
+# polling are dropped, so a crashed process cannot keep a slot.
+#
+# KEYS: waiting zset, heartbeat zset, holders zset
+# ARGV: token, priority, concurrency limit, lease ms, stale waiter ms
+ACQUIRE_SCRIPT = REDIS_CLIENT.register_script("""
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - tonumber(ARGV[5]))
+for _, waiter in ipairs(stale) do
+    redis.call('ZREM', KEYS[1], waiter)
+    redis.call('ZREM', KEYS[2], waiter)
+end
+
+redis.call('ZADD', KEYS[1], 'NX', tonumber(ARGV[2]) * 1e13 + now, ARGV[1])
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+
+local free = tonumber(ARGV[3]) - redis.call('ZCARD', KEYS[3])
+if free > 0 and redis.call('ZRANK', KEYS[1], ARGV[1]) < free then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('ZADD', KEYS[3], now + tonumber(ARGV[4]), ARGV[1])
+    return 1
+end
+return 0
+""")
+
+
+def get_keys(model):
+    return [f"ollama:waiting:{model}", f"ollama:heartbeat:{model}", f"ollama:holders:{model}"]
+
+
+def get_concurrency_limit(model):
+    return settings.OLLAMA_MODEL_CONCURRENCY.get(model, settings.OLLAMA_DEFAULT_CONCURRENCY)
+
+
+@contextmanager
+def ollama_slot(model, priority: OllamaPriority):
+    """
+    Hold one of the model's Ollama slots for the duration of the block.
+
+    Callers across the web and Celery processes share the slots through Redis;
+    interactive calls are served before embeddings, and embeddings before
+    summaries. If Redis is unreachable the call runs unscheduled.
+    """
+    if not settings.OLLAMA_SCHEDULER_ENABLED:
+        yield
+        return
+
+    keys = get_keys(model)
+    token = uuid.uuid4().hex
+    limit = get_concurrency_limit(model)
+    lease_ms = settings.OLLAMA_LEASE_SECONDS * 1000
+
+    start = time.perf_counter()
+    acquired = False
+    try:
+        poll_interval = 0.02
+        while not ACQUIRE_SCRIPT(keys=keys, args=[token, priority.value, limit, lease_ms, 5000]):
+            if time.perf_counter() - start > settings.OLLAMA_WAIT_TIMEOUT:
+                REDIS_CLIENT.zrem(keys[0], token)
+                raise TimeoutError(f"Timed out waiting for an Ollama slot for {model}")
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, 0.25)
+        acquired = True
+    except TimeoutError:
+        raise
+    except Exception as e:
+        logger.warning(f"Ollama scheduler unavailable, calling {model} unscheduled: {str(e)}")
+
+    if acquired:
+        record_wait(priority, time.perf_counter() - start)
+
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                REDIS_CLIENT.zrem(keys[2], token)
+            except Exception as e:
+                logger.warning(f"Could not release Ollama slot for {model}: {str(e)}")
+
+
+def record_wait(priority: OllamaPriority, wait_seconds: float):
+    name = priority.name.lower()
+    try:
+        pipeline = REDIS_CLIENT.pipeline()
+        pipeline.hincrby(METRICS_KEY, f"{name}:calls", 1)
+        pipeline.hincrbyfloat(METRICS_KEY, f"{name}:wait_seconds", wait_seconds)
+        pipeline.lpush(f"ollama:waits:{name}", wait_seconds)
+        pipeline.ltrim(f"ollama:waits:{name}", 0, RECENT_WAITS - 1)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not record Ollama wait time: {str(e)}")
+
+
+def get_scheduler_stats() -> dict:
+    """
+    Return wait-time metrics per priority class and slot usage per model.
+    """
+    metrics = REDIS_CLIENT.hgetall(METRICS_KEY)
+
+    priorities = {}
+    for priority in OllamaPriority:
+        name = priority.name.lower()
+        calls = int(metrics.get(f"{name}:calls".encode(), 0))
+        wait_seconds = float(metrics.get(f"{name}:wait_seconds".encode(), 0))
+        recent = [float(value) for value in REDIS_CLIENT.lrange(f"ollama:waits:{name}", 0, -1)]
+        priorities[name] = {
+            "calls": calls,
+            "average_wait_seconds": round(wait_seconds / calls, 3) if calls else 0.0,
+            "p50_wait_seconds": round(get_percentile(recent, 50) or 0.0, 3),
+            "p95_wait_seconds": round(get_percentile(recent, 95) or 0.0, 3),
+            "max_wait_seconds": round(max(recent, default=0.0), 3),
+        }
+
+    models = {}
+    for model in settings.OLLAMA_MODEL_CONCURRENCY:
+        waiting_key, _, holders_key = get_keys(model)
+        models[model] = {
+            "limit": get_concurrency_limit(model),
+            "active": REDIS_CLIENT.zcard(holders_key),
+            "waiting": REDIS_CLIENT.zcard(waiting_key),
+        }
+
+    return {"priorities": priorities, "models": models}
@@ -0,0 +1,4 @@
+import redis
+from django.conf import settings
+
+REDIS_CLIENT = redis.Redis.from_url(settings.REDIS_URL)
@@ -1,14 +1,30 @@
 import logging
+import os
+import tempfile
 
-from celery import shared_task
+from celery import chain, chord, group, shared_task
+from celery.exceptions import Ignore
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 
-from ..constant import DocumentStatus, MarkdownConverter
-from ..models import Document, DocumentChunk
-from ..services.ollama import EMBEDDING_MODEL
+from ..constant import DocumentStatus, MarkdownConverter, StageStatus
+from ..models import Document, DocumentChunk, ProcessingRun
+from ..services.redis import REDIS_CLIENT
+from ..utils.bulk_copy import copy_chunks, copy_embeddings
+from ..utils.converter import (choose_converter, convert_document,
+                               is_degenerate_markdown)
 from ..utils.doc_processor import DocumentProcessor
-from ..utils.extractor import split_text_into_chunks
+from ..utils.document_lease import (LeaseLost, StageLeaseHeartbeat,
+                                    acquire_stage_lease, release_stage_lease)
+from ..utils.embedding_cache import embed_documents_cached
+from ..utils.extractor import (remove_repeated_boilerplate, split_pages,
+                               split_text_into_chunks)
+from ..utils.minhash import compute_lsh_bands, compute_minhash, estimate_similarity
+from ..utils.ocr import find_pages_without_text, ocr_pages
+from ..utils.pdf import get_page_ranges, get_page_text_lengths, split_pdf
+from ..utils.processing_runs import finish_stage_run, start_stage_run, track_token_usage
+from ..utils.scheduling import estimate_document_cost
 
 logger = logging.getLogger(__name__)
 
@@ -26,60 +42,373 @@ def update_document_status(doc_instance, status, update_fields=None, failed=Fals
     logger.info(f"Document status updated to '{status.value}' for Document ID: {doc_instance.id}")
 
 
+def update_stage_status(doc_instance, stage_field, stage_status, failed=False):
+    """
+    Updates the status of one branch of the pipeline ("summary_status" or "embedding_status").
+    """
+    update_fields = [stage_field]
+    if failed:
+        doc_instance.is_failed = True
+        update_fields.append("is_failed")
+    setattr(doc_instance, stage_field, stage_status.value)
+    doc_instance.save(update_fields=update_fields)
+
+
+def finalize_document(doc_id):
+    """
+    Join step of the pipeline: marks the document completed once both the
+    summary and embedding branches have finished.
+    """
+    with transaction.atomic():
+        doc_instance = Document.objects.select_for_update().get(id=doc_id)
+        if (
+            doc_instance.summary_status == StageStatus.COMPLETED.value
+            and doc_instance.embedding_status == StageStatus.COMPLETED.value
+        ):
+            update_document_status(doc_instance, DocumentStatus.COMPLETED)
+
+
+def build_document_pipeline(doc_id, extract=True, summarize=True, embed=True, priority=None):
+    """
+    Builds the processing workflow for a document.
+
+    Summary generation and embedding only need the chunks, so both branches run
+    concurrently after extraction; whichever finishes last completes the document.
+    Every task of the workflow is sent with the given Celery priority.
+    """
+    options = {} if priority is None else {"priority": priority}
+
+    branches = []
+    if summarize:
+        branches.append(generate_summary_task.si(doc_id).set(**options))
+    if embed:
+        branches.append(embed_text_task.si(doc_id).set(**options))
+
+    if extract:
+        return chain(save_chunks_task.si(doc_id).set(**options), group(branches))
+    return group(branches)
+
+
+def assign_near_duplicates(document_chunks, exclude_document_id=None):
+    """
+    Computes MinHash/LSH signatures for unsaved chunks and points each chunk that
+    nearly duplicates an existing one at that chunk, so it can reuse its vector.
+
+    Chunks of exclude_document_id are not used as candidates, so chunks that are
+    about to be replaced never become duplicate targets.
+    """
+    for chunk in document_chunks:
+        chunk.minhash = compute_minhash(chunk.content)
+        chunk.lsh_bands = compute_lsh_bands(chunk.minhash)
+
+    threshold = settings.NEAR_DUPLICATE_THRESHOLD
+    if threshold <= 0:
+        return
+
+    for start in range(0, len(document_chunks), 500):
+        buckets = {}
+        for chunk in document_chunks[start:start + 500]:
+            for band in chunk.lsh_bands:
+                buckets.setdefault(band, []).append(chunk)
+
+        candidates = DocumentChunk.objects.filter(lsh_bands__overlap=list(buckets), duplicate_of__isnull=True)
+        if exclude_document_id is not None:
+            candidates = candidates.exclude(document_id=exclude_document_id)
+        candidates = candidates.only('id', 'minhash', 'lsh_bands')
+        for candidate in candidates.iterator():
+            for band in candidate.lsh_bands:
+                for chunk in buckets.get(band, ()):
+                    if (
+                        chunk.duplicate_of_id is None
+                        and estimate_similarity(chunk.minhash, candidate.minhash) >= threshold
+                    ):
+                        chunk.duplicate_of_id = candidate.id
+
+    duplicates = sum(1 for chunk in document_chunks if chunk.duplicate_of_id)
+    if duplicates:
+        logger.info(f"Found {duplicates} near-duplicate chunks out of {len(document_chunks)}")
+
+
+def insert_chunks(document_chunks):
+    """
+    Inserts unsaved chunks with COPY or bulk_create, depending on CHUNK_WRITE_METHOD.
+    """
+    with transaction.atomic():
+        if settings.CHUNK_WRITE_METHOD == "copy":
+            copy_chunks(document_chunks)
+        else:
+            DocumentChunk.objects.bulk_create(document_chunks, batch_size=1000)
+
+
+def save_chunk_embeddings(chunks):
+    """
+    Writes the vectors of saved chunks with COPY or bulk_update, depending on CHUNK_WRITE_METHOD.
+    """
+    with transaction.atomic():
+        if settings.CHUNK_WRITE_METHOD == "copy":
+            copy_embeddings(chunks)
+        else:
+            DocumentChunk.objects.bulk_update(chunks, ["embedding_vector"])
+
+
+def start_document_processing(doc_instance):
+    """
+    Starts processing a newly stored document and returns the Celery result.
+
+    When a completed document with the same file hash exists, its chunks and
+    vectors are cloned instead of running the pipeline. Otherwise the pipeline is
+    prioritized by its estimated cost, so small documents are not stuck behind
+    large ones.
+    """
+    duplicate = None
+    if doc_instance.file_hash:
+        duplicate = (
+            Document.objects.filter(
+                file_hash=doc_instance.file_hash,
+                status=DocumentStatus.COMPLETED.value,
+                is_failed=False,
+            )
+            .exclude(id=doc_instance.id)
+            .order_by('id')
+            .first()
+        )
+
+    if duplicate:
+        logger.info(f"Document {doc_instance.id} has the same content as Document {duplicate.id}, reusing its chunks")
+        return clone_document_task.delay(doc_instance.id, duplicate.id)
+
+    estimate_document_cost(doc_instance)
+    return build_document_pipeline(doc_instance.id, priority=doc_instance.priority).apply_async()
+
+
 def save_document_chunks(doc_instance, chunks):
     """
     Saves the given chunks to the database and updates the document instance.
+
+    Chunks from an earlier run are replaced, so extracting again never
+    leaves duplicate rows.
     """
+    document_chunks = [
+        DocumentChunk(document=doc_instance, content=chunk, index=index)
+        for index, chunk in enumerate(chunks)
+    ]
+    assign_near_duplicates(document_chunks, exclude_document_id=doc_instance.id)
     with transaction.atomic():
-        document_chunks = [
-            DocumentChunk(document=doc_instance, content=chunk, index=index)
-            for index, chunk in enumerate(chunks)
-        ]
-        DocumentChunk.objects.bulk_create(document_chunks)
+        DocumentChunk.objects.filter(document=doc_instance).delete()
+        insert_chunks(document_chunks)
 
     doc_instance.no_of_chunks = len(chunks)
-    update_document_status(doc_instance, DocumentStatus.TEXT_EXTRACTED, update_fields=["status", "no_of_chunks"])
+    update_document_status(
+        doc_instance,
+        DocumentStatus.TEXT_EXTRACTED,
+        update_fields=["status", "no_of_chunks", "no_of_pages_processed"]
+    )
 
 
-def convert_with_marker(doc_file_path: str) -> str:
+def clone_document_chunks(doc_instance, source_instance):
     """
-    Convert PDF to text using Marker.
+    Copies the chunks and vectors of an already processed document to another document.
     """
-    # Local imports if you prefer lazy loading; or do them at the top if you want one-time init
-    from marker.config.parser import ConfigParser
-    from marker.converters.pdf import PdfConverter
-    from marker.models import create_model_dict
-    from marker.output import text_from_rendered
-    import os
+    batch_size = settings.EMBEDDING_BATCH_SIZE
+    source_chunks = DocumentChunk.objects.filter(document=source_instance).order_by('index')
+
+    with transaction.atomic():
+        DocumentChunk.objects.filter(document=doc_instance).delete()
+        batch = []
+        for chunk in source_chunks.iterator(chunk_size=batch_size):
+            batch.append(DocumentChunk(
+                document=doc_instance,
+                content=chunk.content,
+                index=chunk.index,
+                embedding_vector=chunk.embedding_vector,
+                minhash=chunk.minhash,
+                lsh_bands=chunk.lsh_bands,
+                duplicate_of_id=chunk.duplicate_of_id or chunk.id,
+            ))
+            if len(batch) == batch_size:
+                insert_chunks(batch)
+                batch = []
+        insert_chunks(batch)
+
+    doc_instance.no_of_chunks = source_instance.no_of_chunks
+    doc_instance.no_of_pages = source_instance.no_of_pages
+    doc_instance.no_of_pages_processed = source_instance.no_of_pages_processed
+    doc_instance.title = source_instance.title
+    doc_instance.description = source_instance.description
+    doc_instance.markdown_converter = source_instance.markdown_converter
+    doc_instance.summary_status = StageStatus.COMPLETED.value
+    doc_instance.embedding_status = StageStatus.COMPLETED.value
+    update_document_status(
+        doc_instance,
+        DocumentStatus.COMPLETED,
+        update_fields=[
+            "status", "no_of_chunks", "no_of_pages", "no_of_pages_processed", "title",
+            "description", "markdown_converter", "summary_status", "embedding_status",
+        ]
+    )
+
 
-    os.environ['PYTORCH_MPS_HIGH_WATERMARK_RATIO'] = '0.0'
+def prepare_source_file(doc_instance, text_lengths):
+    """
+    Returns the file to convert, running OCR first on pages without a text layer.
 
-    config = {
-        "output_format": "markdown",
-        "disable_multiprocessing": False,
-        "disable_image_extraction": True,
-    }
-    config_parser = ConfigParser(config)
+    Born-digital PDFs are converted as uploaded. Otherwise only the pages that
+    lack text are OCR'd, and the result is saved as the document's ocr_file,
+    which later runs reuse. If OCR fails, the original file is converted.
+    """
+    if not settings.OCR_ENABLED:
+        return doc_instance.file
+
+    pages = find_pages_without_text(text_lengths)
+    if not pages:
+        logger.info(f"Document ID {doc_instance.id} has a text layer on every page, skipping OCR")
+        return doc_instance.file
+
+    if doc_instance.ocr_file and os.path.exists(os.path.join(settings.MEDIA_ROOT, doc_instance.ocr_file)):
+        logger.info(f"Reusing the OCR output of Document ID {doc_instance.id}")
+        return doc_instance.ocr_file
+
+    ocr_file = os.path.join('docs', str(doc_instance.id), f"{doc_instance.id}_ocr.pdf")
+    ocr_path = os.path.join(settings.MEDIA_ROOT, ocr_file)
+    try:
+        ocr_pages(doc_instance.file, ocr_path, pages)
+    except Exception as e:
+        logger.warning(f"OCR failed for Document ID {doc_instance.id}, converting the original file: {str(e)}")
+        if os.path.exists(ocr_path):
+            os.remove(ocr_path)
+        return doc_instance.file
+
+    doc_instance.ocr_file = ocr_file
+    doc_instance.save(update_fields=["ocr_file"])
+    return doc_instance.ocr_file
+
+
+def get_conversion_source_key(doc_instance, source_file, page_range=None):
+    """
+    Identifies a file to convert by the uploaded file's hash for the conversion cache.
+
+    OCR output and page windows are regenerated with new bytes on every run, so
+    hashing them would never hit the cache on a retry.
+    """
+    if not doc_instance.file_hash:
+        return None
+
+    ocr = None
+    if source_file != doc_instance.file:
+        ocr = {"min_page_chars": settings.OCR_MIN_PAGE_CHARS}
+    return {"file_hash": doc_instance.file_hash, "ocr": ocr, "pages": page_range}
+
+
+def convert_for_document(
+    doc_instance, file_path, page_count, allow_fallback=False, pages_per_range=None, source_key=None
+):
+    """
+    Converts a file with the document's converter.
+
+    When the converter was picked automatically and MarkItDown's output looks
+    degenerate, the file is converted again with Marker, and Marker is recorded
+    as the document's converter for the rest of the run.
+    """
+    text = convert_document(doc_instance.markdown_converter, file_path, pages_per_range, source_key)
+
+    if (
+        allow_fallback
+        and doc_instance.markdown_converter == MarkdownConverter.MARKITDOWN.value
+        and is_degenerate_markdown(text, page_count)
+    ):
+        logger.warning(f"MarkItDown output for Document ID {doc_instance.id} looks degenerate, falling back to Marker")
+        doc_instance.markdown_converter = MarkdownConverter.MARKER.value
+        doc_instance.save(update_fields=["markdown_converter"])
+        text = convert_document(doc_instance.markdown_converter, file_path, pages_per_range, source_key)
 
-    pdf_converter = PdfConverter(
-        config=config_parser.generate_config_dict(),
-        artifact_dict=create_model_dict(),
-        processor_list=config_parser.get_processors(),
-        renderer=config_parser.get_renderer()
-    )
-    rendered = pdf_converter(doc_file_path)
-    text, _, _ = text_from_rendered(rendered)
     return text
 
 
-def convert_with_markitdown(doc_file_path: str) -> str:
+def remove_boilerplate(doc_instance, text):
+    """
+    Strips page separators and repeated headers/footers from converted text,
+    and records how many characters and chunks that saved.
+    """
+    pages = split_pages(text)
+    raw_text = "\n\n".join(pages)
+    if settings.BOILERPLATE_MIN_PAGE_SHARE <= 0:
+        return raw_text
+
+    cleaned_pages, removed_chars = remove_repeated_boilerplate(pages, settings.BOILERPLATE_MIN_PAGE_SHARE)
+    if not removed_chars:
+        return raw_text
+
+    cleaned_text = "\n\n".join(page for page in cleaned_pages if page)
+    chunks_saved = (
+        len(split_text_into_chunks(raw_text, chunk_size=1000, chunk_overlap=100))
+        - len(split_text_into_chunks(cleaned_text, chunk_size=1000, chunk_overlap=100))
+    )
+
+    doc_instance.boilerplate_chars_removed += removed_chars
+    doc_instance.boilerplate_chunks_saved += max(chunks_saved, 0)
+    doc_instance.save(update_fields=["boilerplate_chars_removed", "boilerplate_chunks_saved"])
+    logger.info(
+        f"Removed {removed_chars} boilerplate characters ({chunks_saved} chunks) from Document ID: {doc_instance.id}"
+    )
+    return cleaned_text
+
+
+def stream_document_chunks(doc_instance, source_file, page_count, allow_fallback=False, heartbeat=None):
     """
-    Convert PDF to text using MarkItDown.
+    Converts, chunks, saves and embeds a document one window of pages at a time.
+
+    The last chunk of each window is carried over and re-split with the next
+    window, so chunks never end at a window boundary and indices stay sequential.
+    Chunks become searchable as soon as their window is embedded. Each window
+    is still converted as parallel page ranges on the conversion pool.
     """
-    from markitdown import MarkItDown
-    md = MarkItDown()
-    md_result = md.convert(doc_file_path)
-    return md_result.text_content
+    if heartbeat:
+        heartbeat.check()
+    DocumentChunk.objects.filter(document=doc_instance).delete()
+    doc_instance.no_of_chunks = 0
+    doc_instance.no_of_pages_processed = 0
+    pages_per_range = settings.PDF_PARALLEL_PAGES_PER_RANGE if settings.PDF_PARALLEL_PAGE_THRESHOLD > 0 else None
+
+    carry = ""
+    with tempfile.TemporaryDirectory() as output_dir:
+        for start, end in get_page_ranges(page_count, settings.STREAMING_WINDOW_PAGES):
+            [window_path] = split_pdf(source_file, [(start, end)], output_dir)
+            text = convert_for_document(
+                doc_instance, window_path, end - start, allow_fallback, pages_per_range,
+                get_conversion_source_key(doc_instance, source_file, (start, end)),
+            )
+            text = remove_boilerplate(doc_instance, text)
+            os.remove(window_path)
+
+            chunks = split_text_into_chunks(
+                f"{carry}\n\n{text}" if carry else text,
+                chunk_size=1000,
+                chunk_overlap=100
+            )
+            carry = chunks.pop() if end < page_count and chunks else ""
+
+            document_chunks = [
+                DocumentChunk(document=doc_instance, content=chunk, index=doc_instance.no_of_chunks + offset)
+                for offset, chunk in enumerate(chunks)
+            ]
+            assign_near_duplicates(document_chunks)
+            if heartbeat:
+                heartbeat.check()
+            DocumentChunk.objects.bulk_create(document_chunks)
+            doc_instance.no_of_chunks += len(document_chunks)
+            doc_instance.no_of_pages_processed = end
+            doc_instance.save(update_fields=["no_of_chunks", "no_of_pages_processed"])
+
+            try:
+                for batch_start in range(0, len(document_chunks), settings.EMBEDDING_BATCH_SIZE):
+                    embed_chunk_batch(document_chunks[batch_start:batch_start + settings.EMBEDDING_BATCH_SIZE])
+            except Exception as e:
+                # The embedding branch picks up whatever is still missing a vector
+                logger.warning(f"Embedding pages {start + 1}-{end} of Document ID {doc_instance.id} failed: {str(e)}")
+
+            logger.info(f"Processed pages {start + 1}-{end} of {page_count} for Document ID: {doc_instance.id}")
+
+    update_document_status(doc_instance, DocumentStatus.TEXT_EXTRACTED)
 
 
 @shared_task(bind=True)
@@ -89,26 +418,67 @@ def save_chunks_task(self, doc_id):
     """
     logger.info("Starting chunk extraction for Document ID: %s", doc_id)
 
+    lease_token = acquire_stage_lease(doc_id, "extraction")
+    if not lease_token:
+        # The pipeline already extracting this document also runs the later stages
+        raise Ignore()
+
+    heartbeat = StageLeaseHeartbeat(doc_id, "extraction", lease_token).start()
     try:
         doc_instance = Document.objects.get(id=doc_id)
+        run = start_stage_run(doc_id, "extraction", self)
         update_document_status(doc_instance, DocumentStatus.TEXT_EXTRACTING)
 
-        if doc_instance.markdown_converter == MarkdownConverter.MARKER.value:
-            text = convert_with_marker(doc_instance.file)
-        elif doc_instance.markdown_converter == MarkdownConverter.MARKITDOWN.value:
-            text = convert_with_markitdown(doc_instance.file)
+        text_lengths = get_page_text_lengths(doc_instance.file)
+        source_file = prepare_source_file(doc_instance, text_lengths)
+
+        auto_converter = doc_instance.markdown_converter in (None, "", MarkdownConverter.AUTO.value)
+        if auto_converter:
+            # Probe the OCR output when there is one, so recovered text layers count
+            if source_file != doc_instance.file:
+                doc_instance.markdown_converter = choose_converter(get_page_text_lengths(source_file))
+            else:
+                doc_instance.markdown_converter = choose_converter(text_lengths)
+            logger.info(f"Selected converter '{doc_instance.markdown_converter}' for Document ID: {doc_id}")
+
+        heartbeat.check()
+        doc_instance.no_of_pages = len(text_lengths)
+        doc_instance.boilerplate_chars_removed = 0
+        doc_instance.boilerplate_chunks_saved = 0
+        doc_instance.save(update_fields=[
+            "no_of_pages", "markdown_converter", "boilerplate_chars_removed", "boilerplate_chunks_saved"
+        ])
+
+        # Only documents big enough for parallel conversion are streamed
+        window_pages = settings.STREAMING_WINDOW_PAGES
+        if (
+            0 < window_pages < doc_instance.no_of_pages
+            and settings.PDF_PARALLEL_PAGE_THRESHOLD <= doc_instance.no_of_pages
+        ):
+            stream_document_chunks(doc_instance, source_file, doc_instance.no_of_pages, auto_converter, heartbeat)
         else:
-            raise ValueError(
-                f"Invalid markdown converter: {doc_instance.markdown_converter}"
+            text = convert_for_document(
+                doc_instance, source_file, doc_instance.no_of_pages, auto_converter,
+                source_key=get_conversion_source_key(doc_instance, source_file),
             )
+            text = remove_boilerplate(doc_instance, text)
 
-        chunks = split_text_into_chunks(
-            text,
-            chunk_size=1000,
-            chunk_overlap=100
+            chunks = split_text_into_chunks(
+                text,
+                chunk_size=1000,
+                chunk_overlap=100
+            )
+            doc_instance.no_of_pages_processed = doc_instance.no_of_pages
+            heartbeat.check()
+            save_document_chunks(doc_instance, chunks)
+
+        finish_stage_run(
+            run,
+            converter=doc_instance.markdown_converter,
+            no_of_pages=doc_instance.no_of_pages,
+            no_of_chunks=doc_instance.no_of_chunks,
+            bytes_processed=os.path.getsize(doc_instance.file),
         )
-        save_document_chunks(doc_instance, chunks)
-
         logger.info("Successfully processed and saved chunks for Document ID: %s", doc_id)
         return doc_instance.id
 
@@ -116,72 +486,404 @@ def save_chunks_task(self, doc_id):
         logger.error("Document with ID %s does not exist. Error: %s", doc_id, str(e))
         raise
 
+    except LeaseLost as e:
+        # Another pipeline took over the document, including its later stages
+        logger.warning(f"Stopping extraction: {str(e)}")
+        finish_stage_run(run, failed=True, converter=doc_instance.markdown_converter)
+        raise Ignore()
+
     except Exception as e:
         logger.error("Error processing document ID %s: %s", doc_id, str(e))
+        if 'doc_instance' in locals():
+            update_document_status(doc_instance, DocumentStatus.TEXT_EXTRACTING, failed=True)
+        if 'run' in locals():
+            finish_stage_run(run, failed=True, converter=doc_instance.markdown_converter)
         raise
 
+    finally:
+        heartbeat.stop()
+        release_stage_lease(doc_id, "extraction", lease_token)
+
+def embed_chunk_batch(chunks):
+    """
+    Embeds a batch of chunks and writes their vectors in a short transaction.
+    """
+    duplicate_vectors = dict(
+        DocumentChunk.objects.filter(
+            id__in={chunk.duplicate_of_id for chunk in chunks if chunk.duplicate_of_id},
+            embedding_vector__isnull=False,
+        ).values_list('id', 'embedding_vector')
+    )
+    for chunk in chunks:
+        if chunk.duplicate_of_id in duplicate_vectors:
+            chunk.embedding_vector = duplicate_vectors[chunk.duplicate_of_id]
+
+    # Near-duplicates reuse the vector of the chunk they duplicate
+    to_embed = [chunk for chunk in chunks if chunk.duplicate_of_id not in duplicate_vectors]
+    if to_embed:
+        embeddings = embed_documents_cached([chunk.content for chunk in to_embed])
+        for chunk, embedding in zip(to_embed, embeddings):
+            chunk.embedding_vector = embedding
+
+    save_chunk_embeddings(chunks)
+
+
 @shared_task(bind=True)
-def embed_text_task(self, doc_id):
+def clone_document_task(self, doc_id, source_doc_id):
     """
-    Task to embed text chunks using OllamaEmbeddings and update the document.
+    Task to reuse the chunks, vectors and summary of a document with identical content.
     """
+    lease_token = acquire_stage_lease(doc_id, "extraction")
+    if not lease_token:
+        raise Ignore()
+
     try:
-        with transaction.atomic():
-            doc_instance = Document.objects.select_for_update().get(id=doc_id)
-            update_document_status(doc_instance, DocumentStatus.EMBEDDING_TEXT)
+        doc_instance = Document.objects.get(id=doc_id)
+        source_instance = Document.objects.get(id=source_doc_id)
+        run = start_stage_run(doc_id, "clone", self)
+        clone_document_chunks(doc_instance, source_instance)
+        finish_stage_run(run, no_of_pages=doc_instance.no_of_pages, no_of_chunks=doc_instance.no_of_chunks)
+        logger.info(f"Document ID: {doc_id} cloned from duplicate Document ID: {source_doc_id}")
+        return doc_id
 
-            chunks = DocumentChunk.objects.filter(document=doc_instance)
-            if not chunks.exists():
-                raise ValueError(f"No chunks found for document {doc_id}")
+    except ObjectDoesNotExist as e:
+        logger.error(f"Cannot clone Document ID {doc_id} from {source_doc_id}: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Cloning failed for Document ID {doc_id}: {str(e)}")
+        if 'doc_instance' in locals():
+            update_document_status(doc_instance, DocumentStatus.PENDING, failed=True)
+        if 'run' in locals():
+            finish_stage_run(run, failed=True)
+        raise
+    finally:
+        release_stage_lease(doc_id, "extraction", lease_token)
 
-            embeddings = EMBEDDING_MODEL.embed_documents([chunk.content for chunk in chunks])
-            for chunk, embedding in zip(chunks, embeddings):
-                chunk.embedding_vector = embedding
 
-            DocumentChunk.objects.bulk_update(chunks, ["embedding_vector"])
-            update_document_status(doc_instance, DocumentStatus.COMPLETED)
+@shared_task(bind=True)
+def embed_text_task(self, doc_id):
+    """
+    Task to embed text chunks using OllamaEmbeddings and update the document.
 
+    Chunks are embedded in batches of EMBEDDING_BATCH_SIZE; each batch is written
+    as soon as it comes back, and no lock is held during the remote call.
+    """
+    lease_token = acquire_stage_lease(doc_id, "embedding")
+    if not lease_token:
+        raise Ignore()
+
+    heartbeat = StageLeaseHeartbeat(doc_id, "embedding", lease_token).start()
+    try:
+        doc_instance = Document.objects.get(id=doc_id)
+        run = start_stage_run(doc_id, "embedding", self)
+        chunks_in_run = 0
+        bytes_in_run = 0
+        update_stage_status(doc_instance, "embedding_status", StageStatus.RUNNING)
+        update_document_status(doc_instance, DocumentStatus.EMBEDDING_TEXT)
+
+        chunks = DocumentChunk.objects.filter(document=doc_instance)
+        total_chunks = chunks.count()
+        if not total_chunks:
+            raise ValueError(f"No chunks found for document {doc_id}")
+
+        # Only chunks still missing a vector are embedded, so retries resume
+        # where the previous attempt stopped.
+        chunk_ids = list(
+            chunks.filter(embedding_vector__isnull=True)
+            .order_by('index')
+            .values_list('id', flat=True)
+        )
+        embedded_chunks = total_chunks - len(chunk_ids)
+        if embedded_chunks:
+            logger.info(f"Resuming embedding for Document ID: {doc_id}, {embedded_chunks} of {total_chunks} chunks already embedded")
+
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(chunk_ids), batch_size):
+            batch_ids = chunk_ids[start:start + batch_size]
+            if len(batch_ids) < batch_size and settings.EMBEDDING_BATCH_MAX_WAIT > 0:
+                # Too few chunks for a full request; let the cross-document
+                # batcher combine them with other documents' leftovers.
+                update_stage_status(doc_instance, "embedding_status", StageStatus.QUEUED)
+                update_document_status(doc_instance, DocumentStatus.EMBEDDING_QUEUED)
+                flush_embedding_batches_task.apply_async(countdown=settings.EMBEDDING_BATCH_MAX_WAIT)
+                logger.info(f"Queued {len(batch_ids)} chunks of Document ID: {doc_id} for batched embedding")
+                finish_stage_run(run, no_of_chunks=chunks_in_run, bytes_processed=bytes_in_run)
+                return doc_id
+
+            heartbeat.check()
+            batch = list(DocumentChunk.objects.filter(id__in=batch_ids).only('id', 'content', 'duplicate_of'))
+            embed_chunk_batch(batch)
+            embedded_chunks += len(batch)
+            chunks_in_run += len(batch)
+            bytes_in_run += sum(len(chunk.content.encode()) for chunk in batch)
+            logger.info(f"Embedded {embedded_chunks} of {total_chunks} chunks for Document ID: {doc_id}")
+
+        heartbeat.check()
+        update_stage_status(doc_instance, "embedding_status", StageStatus.COMPLETED)
+        update_document_status(doc_instance, DocumentStatus.EMBEDDED_TEXT)
+        finish_stage_run(run, no_of_chunks=chunks_in_run, bytes_processed=bytes_in_run)
+        finalize_document(doc_id)
         return doc_id
 
     except ObjectDoesNotExist:
         logger.error(f"Document with ID {doc_id} does not exist.")
         raise
+    except LeaseLost as e:
+        logger.warning(f"Stopping embedding: {str(e)}")
+        finish_stage_run(run, failed=True, no_of_chunks=chunks_in_run, bytes_processed=bytes_in_run)
+        raise Ignore()
     except Exception as e:
         logger.error(f"Embedding failed for document {doc_id}: {str(e)}")
         if 'doc_instance' in locals():
-            update_document_status(doc_instance, DocumentStatus.EMBEDDING_TEXT, failed=True)
+            update_stage_status(doc_instance, "embedding_status", StageStatus.FAILED, failed=True)
+        if 'run' in locals():
+            finish_stage_run(run, failed=True, no_of_chunks=chunks_in_run, bytes_processed=bytes_in_run)
         raise self.retry(exc=e, countdown=60, max_retries=1)
+    finally:
+        heartbeat.stop()
+        release_stage_lease(doc_id, "embedding", lease_token)
+
+
+def save_document_summary(doc_instance, title, summary):
+    """
+    Saves the generated title and summary and completes the summary branch.
+    """
+    doc_instance.description = summary
+    doc_instance.title = title
+    doc_instance.summary_status = StageStatus.COMPLETED.value
+    update_document_status(
+        doc_instance,
+        DocumentStatus.SUMMARY_GENERATED,
+        update_fields=["status", "description", "title", "summary_status"]
+    )
+    finalize_document(doc_instance.id)
+
+
+def get_summary_groups(chunk_indices):
+    """
+    Groups consecutive chunk indices for map-reduce summarization.
+
+    Groups have a fixed number of chunks so an edit only changes the groups it
+    touches. When the document exceeds SUMMARY_TOKEN_BUDGET (estimated at four
+    characters per token), evenly spaced groups are kept to fit the budget.
+    """
+    group_size = settings.SUMMARY_GROUP_CHUNKS
+    groups = [chunk_indices[start:start + group_size] for start in range(0, len(chunk_indices), group_size)]
+
+    tokens_per_group = group_size * 1000 // 4
+    max_groups = max(settings.SUMMARY_TOKEN_BUDGET // tokens_per_group, 1)
+    if len(groups) > max_groups:
+        step = len(groups) / max_groups
+        groups = [groups[int(position * step)] for position in range(max_groups)]
+
+    return groups
 
 
 @shared_task(bind=True)
 def generate_summary_task(self, doc_id):
     """
-    Task to generate a summary and title for a document based on its first chunk.
+    Task to generate a summary and title for a document.
+
+    Short documents are summarized in a single call. Longer documents are
+    summarized map-reduce style: groups of chunks are summarized concurrently
+    by subtasks and the partial summaries are reduced into the final one.
+    The summary lease and stage run are then handed to the chord and closed by
+    its callback.
     """
+    lease_token = acquire_stage_lease(doc_id, "summary")
+    if not lease_token:
+        raise Ignore()
+
+    handed_off = False
+    heartbeat = StageLeaseHeartbeat(doc_id, "summary", lease_token).start()
     try:
         logger.info(f"Starting summary generation for Document ID: {doc_id}")
         doc_instance = Document.objects.get(id=doc_id)
+        run = start_stage_run(doc_id, "summary", self)
+        update_stage_status(doc_instance, "summary_status", StageStatus.RUNNING)
         update_document_status(doc_instance, DocumentStatus.GENERATING_SUMMARY)
 
-        first_chunk = DocumentChunk.objects.filter(document=doc_instance).first()
-        
-        if first_chunk:
-            summary = DocumentProcessor.generate_summary(first_chunk.content)
-            title = DocumentProcessor.generate_title(summary)
-
-            doc_instance.description = summary
-            doc_instance.title = title
-            update_document_status(doc_instance, DocumentStatus.SUMMARY_GENERATED, update_fields=["status", "description", "title"])
+        chunk_indices = list(
+            DocumentChunk.objects.filter(document=doc_instance)
+            .order_by('index')
+            .values_list('index', flat=True)
+        )
 
+        if not chunk_indices:
+            update_stage_status(doc_instance, "summary_status", StageStatus.FAILED, failed=True)
+            finish_stage_run(run, failed=True)
+            logger.warning(f"No chunks found for Document ID: {doc_id}, cannot generate summary.")
+        elif len(chunk_indices) <= settings.SUMMARY_GROUP_CHUNKS:
+            contents = (
+                DocumentChunk.objects.filter(document=doc_instance)
+                .order_by('index')
+                .values_list('content', flat=True)
+            )
+            with track_token_usage(run):
+                title, summary = DocumentProcessor.generate_title_and_summary_cached("\n".join(contents))
+            heartbeat.check()
+            save_document_summary(doc_instance, title, summary)
+            finish_stage_run(run, no_of_chunks=len(chunk_indices))
             logger.info(f"Summary and title generated for Document ID: {doc_id}")
         else:
-            update_document_status(doc_instance, DocumentStatus.FAILED, failed=True)
-            logger.warning(f"No chunks found for Document ID: {doc_id}, cannot generate summary.")
+            groups = get_summary_groups(chunk_indices)
+            options = {} if doc_instance.priority is None else {"priority": doc_instance.priority}
+            summary_chord = chord(
+                [summarize_chunk_group_task.s(doc_id, group, lease_token, run.id).set(**options) for group in groups],
+                reduce_summaries_task.s(doc_id, lease_token, run.id).set(**options).on_error(
+                    summary_failed_task.si(doc_id, lease_token, run.id)
+                ),
+            )
+            summary_chord.apply_async()
+            handed_off = True
+            logger.info(f"Summarizing Document ID: {doc_id} as {len(groups)} chunk groups")
 
         return doc_instance.id
 
+    except LeaseLost as e:
+        logger.warning(f"Discarding the summary: {str(e)}")
+        finish_stage_run(run, failed=True)
+        raise Ignore()
     except Exception as e:
         if 'doc_instance' in locals():
-            update_document_status(doc_instance, DocumentStatus.GENERATING_SUMMARY, failed=True)
+            update_stage_status(doc_instance, "summary_status", StageStatus.FAILED, failed=True)
+        if 'run' in locals() and not handed_off:
+            finish_stage_run(run, failed=True)
         logger.error(f"Summary generation failed for Document ID {doc_id}: {str(e)}")
         raise self.retry(exc=e, countdown=60, max_retries=1)
+    finally:
+        heartbeat.stop()
+        if not handed_off:
+            release_stage_lease(doc_id, "summary", lease_token)
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=30, max_retries=2)
+def summarize_chunk_group_task(self, doc_id, chunk_indices, lease_token=None, run_id=None):
+    """
+    Task to summarize one group of consecutive chunks of a document.
+
+    The summary lease is kept alive while the group is summarized; the reduce
+    step checks that it still holds it before saving anything.
+    """
+    contents = (
+        DocumentChunk.objects.filter(document_id=doc_id, index__in=chunk_indices)
+        .order_by('index')
+        .values_list('content', flat=True)
+    )
+    with StageLeaseHeartbeat(doc_id, "summary", lease_token):
+        if not run_id:
+            return DocumentProcessor.generate_summary_cached("\n".join(contents))
+
+        with track_token_usage(ProcessingRun.objects.get(id=run_id)):
+            return DocumentProcessor.generate_summary_cached("\n".join(contents))
+
+
+@shared_task(bind=True)
+def reduce_summaries_task(self, partial_summaries, doc_id, lease_token=None, run_id=None):
+    """
+    Task to reduce the partial summaries of a document into its final title and summary.
+    """
+    heartbeat = StageLeaseHeartbeat(doc_id, "summary", lease_token).start()
+    try:
+        doc_instance = Document.objects.get(id=doc_id)
+        run = ProcessingRun.objects.get(id=run_id) if run_id else start_stage_run(doc_id, "summary", self)
+        combined = "\n\n".join(
+            f"Part {number}:\n{partial_summary}"
+            for number, partial_summary in enumerate(partial_summaries, start=1)
+        )
+        with track_token_usage(run):
+            title, summary = DocumentProcessor.generate_title_and_summary_cached(combined)
+        heartbeat.check()
+        save_document_summary(doc_instance, title, summary)
+        finish_stage_run(run, no_of_chunks=doc_instance.no_of_chunks)
+
+        logger.info(f"Summary and title generated from {len(partial_summaries)} parts for Document ID: {doc_id}")
+        return doc_id
+
+    except LeaseLost as e:
+        logger.warning(f"Discarding the summary: {str(e)}")
+        finish_stage_run(run, failed=True)
+        raise Ignore()
+    except Exception as e:
+        if 'doc_instance' in locals():
+            update_stage_status(doc_instance, "summary_status", StageStatus.FAILED, failed=True)
+        if 'run' in locals():
+            finish_stage_run(run, failed=True)
+        logger.error(f"Summary reduction failed for Document ID {doc_id}: {str(e)}")
+        raise
+    finally:
+        heartbeat.stop()
+        release_stage_lease(doc_id, "summary", lease_token)
+
+
+@shared_task
+def summary_failed_task(doc_id, lease_token=None, run_id=None):
+    """
+    Task run when a summary subtask fails, so the document can be retried.
+    """
+    release_stage_lease(doc_id, "summary", lease_token)
+    if run_id:
+        finish_stage_run(ProcessingRun.objects.get(id=run_id), failed=True)
+    doc_instance = Document.objects.get(id=doc_id)
+    update_stage_status(doc_instance, "summary_status", StageStatus.FAILED, failed=True)
+    logger.error(f"Map-reduce summarization failed for Document ID: {doc_id}")
+
+
+@shared_task(bind=True, max_retries=None)
+def flush_embedding_batches_task(self):
+    """
+    Task to embed the pending chunks of every queued document in full-size batches.
+
+    Chunks from many small documents share one embedding request. A document's
+    embedding branch is completed as soon as its last chunk has a vector, even
+    when its summary branch has failed.
+    """
+    lock = REDIS_CLIENT.lock("embedding_batcher", timeout=600)
+    if not lock.acquire(blocking=False):
+        # Another flush is running; come back later for anything it misses.
+        raise self.retry(countdown=settings.EMBEDDING_BATCH_MAX_WAIT)
+
+    run = start_stage_run(None, "embedding_batch", self)
+    chunks_in_run = 0
+    bytes_in_run = 0
+    try:
+        while True:
+            batch = list(
+                DocumentChunk.objects.filter(
+                    embedding_vector__isnull=True,
+                    document__embedding_status=StageStatus.QUEUED.value,
+                )
+                .order_by('document_id', 'index')
+                .only('id', 'document', 'content', 'duplicate_of')[:settings.EMBEDDING_BATCH_SIZE]
+            )
+            if not batch:
+                break
+
+            doc_ids = {chunk.document_id for chunk in batch}
+            try:
+                embed_chunk_batch(batch)
+            except Exception as e:
+                logger.error(f"Batched embedding failed for documents {sorted(doc_ids)}: {str(e)}")
+                for doc_instance in Document.objects.filter(id__in=doc_ids):
+                    update_stage_status(doc_instance, "embedding_status", StageStatus.FAILED, failed=True)
+                continue
+
+            logger.info(f"Embedded batch of {len(batch)} chunks across {len(doc_ids)} documents")
+            chunks_in_run += len(batch)
+            bytes_in_run += sum(len(chunk.content.encode()) for chunk in batch)
+
+            completed_docs = Document.objects.filter(id__in=doc_ids).exclude(
+                chunks__embedding_vector__isnull=True
+            )
+            for doc_instance in completed_docs:
+                update_stage_status(doc_instance, "embedding_status", StageStatus.COMPLETED)
+                finalize_document(doc_instance.id)
+
+            lock.reacquire()
+
+        finish_stage_run(run, no_of_chunks=chunks_in_run, bytes_processed=bytes_in_run)
+    except Exception:
+        finish_stage_run(run, failed=True, no_of_chunks=chunks_in_run, bytes_processed=bytes_in_run)
+        raise
+    finally:
+        lock.release()
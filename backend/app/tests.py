@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase
+
+from .utils.extractor import remove_repeated_boilerplate
+
+
+class RemoveRepeatedBoilerplateTests(SimpleTestCase):
+    def test_keeps_lines_that_differ_per_page(self):
+        pages = [
+            f"ACME CORP CONFIDENTIAL\n## Article {i}\nThe parties agree to clause {i}.\n"
+            f"Total amount due: ${i * 100}.00\nPage {i} of 10"
+            for i in range(1, 11)
+        ]
+
+        cleaned, removed = remove_repeated_boilerplate(pages)
+
+        for i, page in enumerate(cleaned, start=1):
+            self.assertNotIn("ACME CORP CONFIDENTIAL", page)
+            self.assertNotIn(f"Page {i} of 10", page)
+            self.assertIn(f"## Article {i}", page)
+            self.assertIn(f"Total amount due: ${i * 100}.00", page)
+        self.assertTrue(removed)
+
+    def test_never_empties_a_short_page(self):
+        pages = [f"Invoice {i}\nTotal amount due: ${i * 100}.00" for i in range(1, 11)]
+
+        cleaned, removed = remove_repeated_boilerplate(pages)
+
+        self.assertEqual(cleaned, pages)
+        self.assertEqual(removed, 0)
+
+    def test_page_numbers_must_follow_the_page_index(self):
+        pages = [f"Order {i}\nFirst item {i}\nSecond item {i}\nThird item {i}\n{7 * i}" for i in range(1, 11)]
+
+        cleaned, removed = remove_repeated_boilerplate(pages)
+
+        self.assertEqual(cleaned, pages)
+        self.assertEqual(removed, 0)
+
+    def test_removes_long_running_headers_with_varying_numbers(self):
+        pages = [
+            f"Quarterly Report of Example Holdings, Q{i % 4 + 1} 2024\nFirst line {i}\n"
+            f"Second line {i}\nThird line {i}\n{i}"
+            for i in range(1, 11)
+        ]
+
+        cleaned, _ = remove_repeated_boilerplate(pages)
+
+        for i, page in enumerate(cleaned, start=1):
+            self.assertNotIn("Quarterly Report", page)
+            self.assertEqual(page, f"First line {i}\nSecond line {i}\nThird line {i}")
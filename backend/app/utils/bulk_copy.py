@@ -0,0 +1,80 @@
+import csv
+import io
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import DocumentChunk
+
+CHUNK_COLUMNS = [
+    "document_id", "index", "content", "embedding_vector",
+    "minhash", "lsh_bands", "duplicate_of_id", "created_at", "updated_at",
+]
+
+
+def format_vector(vector):
+    if vector is None:
+        return None
+    return "[" + ",".join(repr(float(value)) for value in vector) + "]"
+
+
+def format_array(values):
+    if values is None:
+        return None
+    return "{" + ",".join(str(value) for value in values) + "}"
+
+
+def copy_chunks(document_chunks):
+    """
+    Insert unsaved DocumentChunk instances with COPY instead of INSERT.
+
+    Unlike bulk_create the instances do not get their primary keys back.
+    """
+    now = timezone.now().isoformat()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for chunk in document_chunks:
+        writer.writerow([
+            chunk.document_id,
+            chunk.index,
+            chunk.content,
+            format_vector(chunk.embedding_vector),
+            format_array(chunk.minhash),
+            format_array(chunk.lsh_bands),
+            chunk.duplicate_of_id,
+            now,
+            now,
+        ])
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {DocumentChunk._meta.db_table} ({', '.join(CHUNK_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (content))",
+            buffer,
+        )
+
+
+def copy_embeddings(chunks):
+    """
+    Write the embedding vectors of saved chunks by COPYing them into a staging
+    table and merging it with one UPDATE, instead of bulk_update's CASE expression.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for chunk in chunks:
+        writer.writerow([chunk.id, format_vector(chunk.embedding_vector)])
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS chunk_embedding_staging")
+        cursor.execute(
+            "CREATE TEMP TABLE chunk_embedding_staging "
+            "(id bigint PRIMARY KEY, embedding_vector vector(1024)) ON COMMIT DROP"
+        )
+        cursor.copy_expert("COPY chunk_embedding_staging (id, embedding_vector) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            f"UPDATE {DocumentChunk._meta.db_table} AS chunk "
+            "SET embedding_vector = staging.embedding_vector "
+            "FROM chunk_embedding_staging AS staging WHERE chunk.id = staging.id"
+        )
@@ -0,0 +1,152 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONVERTER_PACKAGES = {
+    "marker": "marker-pdf",
+    "markitdown": "markitdown",
+}
+
+
+def get_cache_dir() -> str:
+    return os.path.join(settings.MEDIA_ROOT, 'conversion_cache')
+
+
+def hash_file(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as source:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def get_converter_version(markdown_converter: str) -> str:
+    try:
+        return version(CONVERTER_PACKAGES[markdown_converter])
+    except (KeyError, PackageNotFoundError):
+        return "unknown"
+
+
+def get_cache_key(file_path: str, markdown_converter: str, config: dict, source_key: dict = None) -> str:
+    """
+    Build the cache key from the file content, converter name, converter version and config.
+
+    A source_key describing where the file came from replaces the content hash,
+    for generated files such as OCR output whose bytes differ on every run.
+    """
+    key_data = json.dumps({
+        "source": source_key or hash_file(file_path),
+        "converter": markdown_converter,
+        "version": get_converter_version(markdown_converter),
+        "config": config,
+    }, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+def get_cache_path(key: str) -> str:
+    return os.path.join(get_cache_dir(), key[:2], f"{key}.md.gz")
+
+
+def get_cached_markdown(key: str):
+    """
+    Return the cached markdown for a key, or None. A hit refreshes the entry's LRU position.
+
+    The cache is best-effort: any error reading it is logged and treated as a miss.
+    """
+    path = get_cache_path(key)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as cached:
+            text = cached.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, UnicodeDecodeError) as e:
+        logger.warning(f"Discarding unreadable conversion cache entry {path}: {str(e)}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    try:
+        os.utime(path)
+    except OSError:
+        # Evicted concurrently; the text is still good
+        pass
+    return text
+
+
+def cache_markdown(key: str, text: str):
+    """
+    Store compressed markdown for a key, then evict old entries beyond CONVERSION_CACHE_MAX_BYTES.
+
+    The cache is best-effort: a full disk or a permission error is logged and
+    the conversion goes on without being cached.
+    """
+    path = get_cache_path(key)
+    temp_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as temp_file:
+            with gzip.GzipFile(fileobj=temp_file, mode='wb') as compressed:
+                compressed.write(text.encode('utf-8'))
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write conversion cache entry {path}: {str(e)}")
+        if temp_path:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return
+
+    try:
+        evict_conversion_cache()
+    except OSError as e:
+        logger.warning(f"Could not evict conversion cache entries: {str(e)}")
+
+
+def evict_conversion_cache():
+    """
+    Delete the least recently used entries until the cache fits in CONVERSION_CACHE_MAX_BYTES.
+    """
+    entries = []
+    total_size = 0
+    for directory, _, files in os.walk(get_cache_dir()):
+        for file_name in files:
+            if not file_name.endswith('.md.gz'):
+                continue
+            path = os.path.join(directory, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+    if total_size <= settings.CONVERSION_CACHE_MAX_BYTES:
+        return
+
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= settings.CONVERSION_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not evict conversion cache entry {path}: {str(e)}")
+            continue
+        total_size -= size
+        logger.info(f"Evicted conversion cache entry {path}")
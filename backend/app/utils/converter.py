@@ -0,0 +1,209 @@
+import logging
+import multiprocessing
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from ..constant import MarkdownConverter
+from ..services.marker import MARKER_CONFIG, load_pdf_converter
+from .conversion_cache import cache_markdown, get_cache_key, get_cached_markdown
+from .pdf import get_page_count, get_page_ranges, split_pdf
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+
+
+def convert_with_marker(doc_file_path: str) -> str:
+    """
+    Convert PDF to text using Marker.
+    """
+    from marker.output import text_from_rendered
+
+    start = time.perf_counter()
+    pdf_converter = load_pdf_converter()
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = pdf_converter(doc_file_path)
+    text, _, _ = text_from_rendered(rendered)
+    convert_seconds = time.perf_counter() - start
+
+    logger.info(
+        f"Marker conversion of {doc_file_path}: load {load_seconds:.2f}s, convert {convert_seconds:.2f}s"
+    )
+    return text
+
+
+def convert_with_markitdown(doc_file_path: str) -> str:
+    """
+    Convert PDF to text using MarkItDown.
+    """
+    from markitdown import MarkItDown
+    md = MarkItDown()
+    md_result = md.convert(doc_file_path)
+    return md_result.text_content
+
+
+CONVERTERS = {
+    MarkdownConverter.MARKER.value: convert_with_marker,
+    MarkdownConverter.MARKITDOWN.value: convert_with_markitdown,
+}
+
+
+def get_conversion_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Return the process pool used for page-parallel conversion, creating it on first use.
+
+    The pool uses spawn so children never inherit torch state from the worker,
+    and it is kept alive so each child loads the Marker models only once. It
+    lives as long as the worker process; see shutdown_conversion_pool.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_conversion_pool():
+    """
+    Stop the conversion pool and its processes, if one was started.
+    """
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def convert_document(
+    markdown_converter: str, doc_file_path: str, pages_per_range: int = None, source_key: dict = None
+) -> str:
+    """
+    Convert a PDF to markdown with the given converter.
+
+    PDFs with at least PDF_PARALLEL_PAGE_THRESHOLD pages are split into page ranges
+    that are converted in parallel, and the markdown is joined back in page order.
+    Results are cached on disk, so converting the same file again is free.
+
+    Args:
+        pages_per_range (int): Convert in parallel page ranges of this size whatever
+            the page count, for windows of a document that is big enough as a whole.
+        source_key (dict): Identifies the file for the cache instead of its content hash,
+            see get_cache_key.
+    """
+    if markdown_converter not in CONVERTERS:
+        raise ValueError(f"Invalid markdown converter: {markdown_converter}")
+
+    threshold = settings.PDF_PARALLEL_PAGE_THRESHOLD
+    page_count = get_page_count(doc_file_path)
+    if pages_per_range is None and 0 < threshold <= page_count:
+        pages_per_range = settings.PDF_PARALLEL_PAGES_PER_RANGE
+    if pages_per_range and pages_per_range >= page_count:
+        # A single range gains nothing from the pool
+        pages_per_range = None
+
+    use_cache = settings.CONVERSION_CACHE_MAX_BYTES > 0
+    if use_cache:
+        config = {"pages_per_range": pages_per_range}
+        if markdown_converter == MarkdownConverter.MARKER.value:
+            config.update(MARKER_CONFIG)
+        cache_key = get_cache_key(doc_file_path, markdown_converter, config, source_key)
+        text = get_cached_markdown(cache_key)
+        if text is not None:
+            logger.info(f"Using cached {markdown_converter} conversion of {doc_file_path}")
+            return text
+
+    if pages_per_range:
+        text = convert_page_ranges(markdown_converter, doc_file_path, page_count, pages_per_range)
+    else:
+        text = CONVERTERS[markdown_converter](doc_file_path)
+
+    if use_cache:
+        cache_markdown(cache_key, text)
+    return text
+
+
+def convert_page_ranges(markdown_converter: str, doc_file_path: str, page_count: int, pages_per_range: int) -> str:
+    """
+    Convert a PDF as page ranges on the process pool and join the markdown in page order.
+
+    If a pool process dies (for example killed for memory), the pool is replaced
+    and the ranges are converted once more before giving up.
+    """
+    page_ranges = get_page_ranges(page_count, pages_per_range)
+    logger.info(f"Converting {doc_file_path} ({page_count} pages) as {len(page_ranges)} page ranges in parallel")
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        range_paths = split_pdf(doc_file_path, page_ranges, output_dir)
+        try:
+            pool = get_conversion_pool(settings.PDF_CONVERSION_WORKERS)
+            texts = list(pool.map(CONVERTERS[markdown_converter], range_paths))
+        except BrokenProcessPool:
+            logger.warning(f"Conversion pool broke while converting {doc_file_path}, restarting it")
+            shutdown_conversion_pool()
+            try:
+                pool = get_conversion_pool(settings.PDF_CONVERSION_WORKERS)
+                texts = list(pool.map(CONVERTERS[markdown_converter], range_paths))
+            except BrokenProcessPool:
+                # Leave no broken pool behind for the next document
+                shutdown_conversion_pool()
+                raise
+
+    logger.info(f"Parallel conversion of {doc_file_path} finished in {time.perf_counter() - start:.2f}s")
+    return "\n\n".join(texts)
+
+
+def choose_converter(text_lengths: list[int]) -> str:
+    """
+    Pick a converter for a PDF from a cheap probe of its text layer.
+
+    MarkItDown is enough when most pages carry a dense text layer; scanned or
+    image-heavy PDFs need Marker's layout models.
+
+    Args:
+        text_lengths (list): Text layer length of each page, from get_page_text_lengths.
+    """
+    page_count = len(text_lengths)
+    if not page_count:
+        return MarkdownConverter.MARKER.value
+
+    image_only_share = sum(
+        1 for length in text_lengths if length < settings.OCR_MIN_PAGE_CHARS
+    ) / page_count
+    chars_per_page = sum(text_lengths) / page_count
+
+    if (
+        image_only_share <= settings.AUTO_CONVERTER_MAX_IMAGE_PAGE_SHARE
+        and chars_per_page >= settings.AUTO_CONVERTER_MIN_CHARS_PER_PAGE
+    ):
+        return MarkdownConverter.MARKITDOWN.value
+    return MarkdownConverter.MARKER.value
+
+
+def is_degenerate_markdown(text: str, page_count: int) -> bool:
+    """
+    Detect fast-path output that lost the document's text.
+
+    Flags output that is nearly empty for its page count, or that is dominated
+    by unmapped glyphs ("(cid:123)") or non-alphanumeric noise.
+    """
+    stripped = "".join(text.split())
+    if len(stripped) < settings.AUTO_CONVERTER_MIN_CHARS_PER_PAGE * max(page_count, 1) / 2:
+        return True
+
+    unmapped_glyph_chars = sum(len(glyph) for glyph in re.findall(r"\(cid:\d+\)", text))
+    if unmapped_glyph_chars > len(stripped) * 0.1:
+        return True
+
+    alphanumeric = sum(1 for char in stripped if char.isalnum())
+    return alphanumeric < len(stripped) * 0.5
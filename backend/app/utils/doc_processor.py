@@ -1,9 +1,17 @@
 import logging
 
+from ..constant import OllamaPriority
 from ..services.ollama import CHAT_LLM
+from ..services.ollama_scheduler import ollama_slot
+from .generation_cache import cache_generation, get_cached_generation, get_generation_key
+from .processing_runs import add_token_usage
 
 logger = logging.getLogger(__name__)
 
+# Bump when the prompts change so cached outputs are not reused
+SUMMARY_PROMPT_VERSION = "1"
+TITLE_AND_SUMMARY_PROMPT_VERSION = "1"
+
 class DocumentProcessor:
     """
     Handles text processing, including summary and title generation for documents.
@@ -26,15 +34,33 @@ class DocumentProcessor:
             "- You will be given a text to summarize, and you will return the summary in markdown format. Do not include any system or user instructions, disclaimers, or references to how you were prompted"
         )
 
-        ai_msg = CHAT_LLM.invoke([
-            ("system", system_prompt),
-            ("human", f"Here is the text to summarize: {text}"),
-        ])
+        with ollama_slot(CHAT_LLM.model, OllamaPriority.SUMMARY):
+            ai_msg = CHAT_LLM.invoke([
+                ("system", system_prompt),
+                ("human", f"Here is the text to summarize: {text}"),
+            ])
+        add_token_usage(ai_msg.usage_metadata)
         logger.info(f"ai_msg: {ai_msg}")
         logger.info("Summary generated successfully.")
         logger.info(f"Summary: {ai_msg.content}")
         return ai_msg.content
 
+    @staticmethod
+    def generate_summary_cached(text: str) -> str:
+        """
+        Generate a summary, reusing the cached result for identical text.
+        """
+        model = CHAT_LLM.model
+        key = get_generation_key("summary", text, SUMMARY_PROMPT_VERSION, model)
+        cached = get_cached_generation(key)
+        if cached:
+            logger.info("Summary served from cache.")
+            return cached["summary"]
+
+        summary = DocumentProcessor.generate_summary(text)
+        cache_generation(key, model, SUMMARY_PROMPT_VERSION, {"summary": summary})
+        return summary
+
     @staticmethod
     def generate_title(summary: str) -> str:
         system_prompt = (
@@ -48,10 +74,12 @@ class DocumentProcessor:
             "Summary: A comprehensive analysis of the economic impacts of climate change on coastal cities.\n"
             "Output: Economic Impacts of Climate Change on Coastal Cities"
         )
-        ai_msg = CHAT_LLM.invoke([
-            ("system", system_prompt),
-            ("human", f"Here is the summary to generate a title from: {summary}"),
-        ])
+        with ollama_slot(CHAT_LLM.model, OllamaPriority.SUMMARY):
+            ai_msg = CHAT_LLM.invoke([
+                ("system", system_prompt),
+                ("human", f"Here is the summary to generate a title from: {summary}"),
+            ])
+        add_token_usage(ai_msg.usage_metadata)
         logger.info(f"ai_msg: {ai_msg}")
         logger.info("Title generated successfully.")
         logger.info(f"Title: {ai_msg.content}")
@@ -105,9 +133,41 @@ class DocumentProcessor:
             },
             "required": ["title", "summary"]
         }
-        ai_msg = CHAT_LLM.with_structured_output(json_schema).invoke([
-            ("system", system_prompt),
-            ("human", f"Text: {text}\n\nProvide the title and summary below:")
-        ])
+        with ollama_slot(CHAT_LLM.model, OllamaPriority.SUMMARY):
+            result = CHAT_LLM.with_structured_output(json_schema, include_raw=True).invoke([
+                ("system", system_prompt),
+                ("human", f"Text: {text}\n\nProvide the title and summary below:")
+            ])
+        add_token_usage(result["raw"].usage_metadata)
+        if result["parsing_error"]:
+            raise result["parsing_error"]
+        ai_msg = result["parsed"]
         logger.info("Title and summary generated successfully.")
-        return ai_msg.title, ai_msg.summary
\ No newline at end of file
+        return ai_msg["title"], ai_msg["summary"]
+
+    @staticmethod
+    def generate_title_and_summary_cached(text: str) -> tuple[str, str]:
+        """
+        Generate a title and summary with a single structured call, reusing cached results.
+
+        Falls back to separate summary and title calls when the structured output
+        cannot be parsed.
+        """
+        model = CHAT_LLM.model
+        key = get_generation_key("title_and_summary", text, TITLE_AND_SUMMARY_PROMPT_VERSION, model)
+        cached = get_cached_generation(key)
+        if cached:
+            logger.info("Title and summary served from cache.")
+            return cached["title"], cached["summary"]
+
+        try:
+            title, summary = DocumentProcessor.generate_title_and_summary(text)
+            if not title or not summary:
+                raise ValueError("Structured output is missing the title or summary")
+        except Exception as e:
+            logger.warning(f"Structured title and summary generation failed, falling back to separate calls: {str(e)}")
+            summary = DocumentProcessor.generate_summary(text)
+            title = DocumentProcessor.generate_title(summary)
+
+        cache_generation(key, model, TITLE_AND_SUMMARY_PROMPT_VERSION, {"title": title, "summary": summary})
+        return title, summary
@@ -0,0 +1,129 @@
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+
+from ..services.redis import REDIS_CLIENT
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("extraction", "embedding", "summary")
+
+# Only the holder of a lease, identified by its token, may extend or release it
+RENEW_SCRIPT = REDIS_CLIENT.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+RELEASE_SCRIPT = REDIS_CLIENT.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+def get_lease_key(doc_id, stage):
+    return f"lease:document:{doc_id}:{stage}"
+
+
+def acquire_stage_lease(doc_id, stage):
+    """
+    Take the expiring lease on a document's stage.
+
+    Returns the lease token, or None when another worker holds the lease.
+    """
+    token = uuid.uuid4().hex
+    acquired = REDIS_CLIENT.set(
+        get_lease_key(doc_id, stage), token, nx=True, px=settings.DOCUMENT_LEASE_SECONDS * 1000
+    )
+    if not acquired:
+        logger.info(f"The {stage} stage of Document ID {doc_id} is already running elsewhere")
+        return None
+    return token
+
+
+def renew_stage_lease(doc_id, stage, token):
+    """
+    Extend a held lease by DOCUMENT_LEASE_SECONDS; returns False if it was lost.
+    """
+    renewed = RENEW_SCRIPT(keys=[get_lease_key(doc_id, stage)], args=[token, settings.DOCUMENT_LEASE_SECONDS * 1000])
+    if not renewed:
+        logger.warning(f"Lost the {stage} lease of Document ID {doc_id}")
+    return bool(renewed)
+
+
+class LeaseLost(Exception):
+    """
+    Raised when a worker no longer holds the lease of the stage it is running.
+    """
+
+
+class StageLeaseHeartbeat:
+    """
+    Renews a held lease from a background thread for the length of a stage.
+
+    OCR or a single long conversion can run past DOCUMENT_LEASE_SECONDS without
+    reaching any point where the stage could renew the lease itself. Call
+    check() before writing results; it raises LeaseLost once a renewal failed,
+    since another pipeline may have taken over the stage by then.
+    """
+
+    def __init__(self, doc_id, stage, token):
+        self.doc_id = doc_id
+        self.stage = stage
+        self.token = token
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"lease-{stage}-{doc_id}", daemon=True)
+
+    def start(self):
+        if self.token:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _beat(self):
+        interval = max(settings.DOCUMENT_LEASE_SECONDS / 3, 1)
+        while True:
+            try:
+                if not renew_stage_lease(self.doc_id, self.stage, self.token):
+                    self.lost = True
+                    return
+            except Exception as e:
+                # Try again on the next beat; the lease outlives a few missed ones
+                logger.warning(f"Could not renew the {self.stage} lease of Document ID {self.doc_id}: {str(e)}")
+            if self._stopped.wait(interval):
+                return
+
+    def check(self):
+        if self.lost:
+            raise LeaseLost(f"Lost the {self.stage} lease of Document ID {self.doc_id}")
+
+
+def release_stage_lease(doc_id, stage, token):
+    if token:
+        RELEASE_SCRIPT(keys=[get_lease_key(doc_id, stage)], args=[token])
+
+
+def get_held_stages(doc_id):
+    """
+    Return the stages of a document currently leased by a worker.
+    """
+    pipeline = REDIS_CLIENT.pipeline()
+    for stage in STAGES:
+        pipeline.exists(get_lease_key(doc_id, stage))
+    return [stage for stage, held in zip(STAGES, pipeline.execute()) if held]
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..constant import OllamaPriority
+from ..models import EmbeddingCache
+from ..services.ollama import EMBEDDING_MODEL
+from ..services.ollama_scheduler import ollama_slot
+from ..services.redis import REDIS_CLIENT
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "embedding_cache:stats"
+
+
+def hash_text(text: str) -> str:
+    """
+    Hash chunk text after collapsing whitespace, so formatting-only differences share an entry.
+    """
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def embed_documents_cached(texts: list[str]) -> list:
+    """
+    Embed texts with the embedding model, serving repeated texts from the cache.
+
+    Only cache misses are sent to Ollama; their vectors are stored for next time.
+    """
+    if settings.EMBEDDING_CACHE_MAX_ENTRIES <= 0:
+        with ollama_slot(EMBEDDING_MODEL.model, OllamaPriority.EMBEDDING):
+            return EMBEDDING_MODEL.embed_documents(texts)
+
+    model_name = EMBEDDING_MODEL.model
+    hashes = [hash_text(text) for text in texts]
+
+    vectors = dict(
+        EmbeddingCache.objects.filter(model=model_name, text_hash__in=set(hashes))
+        .values_list('text_hash', 'embedding_vector')
+    )
+    hit_hashes = set(vectors)
+
+    miss_texts = {}
+    for text_hash, text in zip(hashes, texts):
+        if text_hash not in vectors:
+            miss_texts.setdefault(text_hash, text)
+
+    miss_seconds = 0.0
+    if miss_texts:
+        with ollama_slot(EMBEDDING_MODEL.model, OllamaPriority.EMBEDDING):
+            start = time.perf_counter()
+            embeddings = EMBEDDING_MODEL.embed_documents(list(miss_texts.values()))
+            miss_seconds = time.perf_counter() - start
+
+        vectors.update(zip(miss_texts, embeddings))
+        EmbeddingCache.objects.bulk_create(
+            [
+                EmbeddingCache(model=model_name, text_hash=text_hash, embedding_vector=embedding)
+                for text_hash, embedding in zip(miss_texts, embeddings)
+            ],
+            ignore_conflicts=True,
+        )
+        evict_embedding_cache()
+
+    if hit_hashes:
+        EmbeddingCache.objects.filter(model=model_name, text_hash__in=hit_hashes).update(last_used_at=timezone.now())
+
+    hits = len(texts) - len(miss_texts)
+    record_cache_stats(hits, len(miss_texts), miss_seconds)
+    return [vectors[text_hash] for text_hash in hashes]
+
+
+def evict_embedding_cache():
+    """
+    Delete the least recently used entries beyond EMBEDDING_CACHE_MAX_ENTRIES.
+    """
+    excess = EmbeddingCache.objects.count() - settings.EMBEDDING_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+
+    stale_ids = EmbeddingCache.objects.order_by('last_used_at').values_list('id', flat=True)[:excess]
+    deleted, _ = EmbeddingCache.objects.filter(id__in=list(stale_ids)).delete()
+    logger.info(f"Evicted {deleted} entries from the embedding cache")
+
+
+def record_cache_stats(hits: int, misses: int, miss_seconds: float):
+    try:
+        pipeline = REDIS_CLIENT.pipeline()
+        pipeline.hincrby(STATS_KEY, "hits", hits)
+        pipeline.hincrby(STATS_KEY, "misses", misses)
+        pipeline.hincrbyfloat(STATS_KEY, "miss_seconds", miss_seconds)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not record embedding cache stats: {str(e)}")
+
+
+def get_cache_stats() -> dict:
+    """
+    Return hit/miss counters and the embedding time the cache is estimated to have saved.
+    """
+    stats = REDIS_CLIENT.hgetall(STATS_KEY)
+    hits = int(stats.get(b"hits", 0))
+    misses = int(stats.get(b"misses", 0))
+    miss_seconds = float(stats.get(b"miss_seconds", 0))
+    seconds_per_embedding = miss_seconds / misses if misses else 0.0
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "entries": EmbeddingCache.objects.count(),
+        "max_entries": settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        "estimated_seconds_saved": round(hits * seconds_per_embedding, 2),
+    }
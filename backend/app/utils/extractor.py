@@ -1,5 +1,20 @@
+import math
+import re
+
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+# Page breaks: form feeds from pdfminer (MarkItDown) and the "{n}-----" page
+# separators Marker writes when paginate_output is enabled
+PAGE_BREAK_PATTERN = re.compile(r"\f|^\{\d+\}-{48}$", re.MULTILINE)
+
+# Page number lines such as "3", "- 3 -", "Page 3" or "Page 3 of 10"
+PAGE_NUMBER_PATTERN = re.compile(r"^[\W_]*(?:page\s*)?(\d+)(?:\s*(?:of|/)\s*\d+)?[\W_]*$", re.IGNORECASE)
+
+# Other lines only match across pages with their numbers ignored when this many
+# letters are left, enough to be a running header rather than "Article 3" or
+# "Total amount due: $300.00"
+MIN_NORMALIZED_LINE_LETTERS = 20
+
 
 def split_text_into_chunks(text, chunk_size=1000, chunk_overlap=100):
     """
@@ -67,3 +82,117 @@ def combine_chunks(chunks, chunk_overlap=100):
     print(combined_text)
     
     return combined_text
+
+
+def split_pages(text):
+    """
+    Split converted markdown into pages on form feeds and Marker page separators.
+
+    Args:
+        text (str): The converted markdown.
+
+    Returns:
+        list: The text of each page, with the page separators removed.
+    """
+    return PAGE_BREAK_PATTERN.split(text)
+
+
+def _normalize_line(line):
+    return re.sub(r"\d+", "#", line.strip().lower())
+
+
+def _edge_lines(lines, edge_lines):
+    """
+    Map the first and last edge_lines non-blank lines of a page to their position
+    from the nearest page edge (0, 1, ... from the top; -1, -2, ... from the bottom).
+
+    The window shrinks on short pages so at least one line in the middle of the
+    page is never considered.
+    """
+    non_blank = [number for number, line in enumerate(lines) if line.strip()]
+    edge_lines = min(edge_lines, (len(non_blank) - 1) // 2)
+    if edge_lines <= 0:
+        return {}
+
+    positions = {}
+    for position, number in enumerate(reversed(non_blank[-edge_lines:]), start=1):
+        positions[number] = -position
+    for position, number in enumerate(non_blank[:edge_lines]):
+        positions[number] = position
+    return positions
+
+
+def _varying_line_key(line, position, page_index):
+    """
+    Return the key a line with varying numbers is matched on across pages, or
+    None when it must repeat verbatim.
+
+    Page numbers only match when they follow the page index, so a numbered
+    section or an amount that happens to sit at the page edge is kept.
+    """
+    match = PAGE_NUMBER_PATTERN.match(line)
+    if match:
+        return (position, _normalize_line(line), int(match.group(1)) - page_index)
+    if sum(1 for char in line if char.isalpha()) >= MIN_NORMALIZED_LINE_LETTERS:
+        return (position, _normalize_line(line), None)
+    return None
+
+
+def remove_repeated_boilerplate(pages, min_page_share=0.5, edge_lines=3):
+    """
+    Remove headers and footers repeated across pages.
+
+    Only whole lines among the first and last edge_lines non-blank lines of a
+    page are considered, since that is where headers and footers sit; body text
+    is never touched. A line is removed when it appears at a page edge on at
+    least min_page_share of the pages verbatim. Numbers are only ignored for page
+    numbers that follow the page index ("Page 3 of 10" on the third page) and for
+    long running headers, at the same distance from the page edge.
+    Documents with fewer than three pages are returned unchanged.
+
+    Args:
+        pages (list): The text of each page.
+        min_page_share (float): Share of pages a line must appear on.
+        edge_lines (int): Number of lines at the top and bottom of each page to check.
+
+    Returns:
+        tuple: The cleaned pages and the number of characters removed.
+    """
+    if len(pages) < 3:
+        return pages, 0
+
+    min_pages = max(3, math.ceil(len(pages) * min_page_share))
+
+    exact_counts = {}
+    varying_counts = {}
+    for page_index, page in enumerate(pages):
+        lines = page.splitlines()
+        edge = _edge_lines(lines, edge_lines)
+        for line in {lines[number].strip() for number in edge}:
+            exact_counts[line] = exact_counts.get(line, 0) + 1
+        keys = {_varying_line_key(lines[number].strip(), position, page_index) for number, position in edge.items()}
+        for key in keys - {None}:
+            varying_counts[key] = varying_counts.get(key, 0) + 1
+
+    def is_boilerplate(line, position, page_index):
+        stripped = line.strip()
+        if exact_counts.get(stripped, 0) >= min_pages and re.search(r"[A-Za-z]", stripped):
+            return True
+        key = _varying_line_key(stripped, position, page_index)
+        return key is not None and varying_counts.get(key, 0) >= min_pages
+
+    cleaned_pages = []
+    removed_chars = 0
+    for page_index, page in enumerate(pages):
+        lines = page.splitlines()
+        edge = _edge_lines(lines, edge_lines)
+        kept = [
+            line for number, line in enumerate(lines)
+            if number not in edge or not is_boilerplate(line, edge[number], page_index)
+        ]
+        cleaned = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip() if len(kept) < len(lines) else page
+
+        removed_chars += len(page) - len(cleaned)
+        cleaned_pages.append(cleaned)
+
+    return cleaned_pages, removed_chars
@@ -0,0 +1,32 @@
+import hashlib
+import json
+
+from ..models import GenerationCache
+
+
+def get_generation_key(kind: str, text: str, prompt_version: str, model: str) -> str:
+    """
+    Build the cache key for an LLM output from the input text hash, prompt version and model.
+    """
+    key_data = json.dumps({
+        "kind": kind,
+        "text_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "prompt_version": prompt_version,
+        "model": model,
+    }, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+def get_cached_generation(key: str):
+    """
+    Return the cached output for a key, or None.
+    """
+    entry = GenerationCache.objects.filter(key=key).only('output').first()
+    return entry.output if entry else None
+
+
+def cache_generation(key: str, model: str, prompt_version: str, output):
+    GenerationCache.objects.update_or_create(
+        key=key,
+        defaults={"model": model, "prompt_version": prompt_version, "output": output},
+    )
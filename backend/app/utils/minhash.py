@@ -0,0 +1,66 @@
+import hashlib
+
+import numpy as np
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+SHINGLE_SIZE = 5
+
+# Smallest prime above 2**32; with a < 2**31 and 32-bit shingle hashes,
+# a * x + b stays inside uint64
+_PRIME = np.uint64(4294967311)
+_random = np.random.RandomState(42)
+_A = _random.randint(1, 2 ** 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+_B = _random.randint(0, 2 ** 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+
+def _hash_bytes(data: bytes, signed: bool = False) -> int:
+    digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=signed)
+
+
+def compute_minhash(text: str) -> list[int]:
+    """
+    Compute the MinHash signature of a text over its character shingles.
+
+    Args:
+        text (str): The text to sign; case and whitespace are normalized first.
+
+    Returns:
+        list: NUM_PERMUTATIONS integers.
+    """
+    normalized = " ".join(text.lower().split())
+    if len(normalized) < SHINGLE_SIZE:
+        normalized = normalized.ljust(SHINGLE_SIZE)
+
+    shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    hashes = np.array(
+        [_hash_bytes(shingle.encode("utf-8")) & 0xFFFFFFFF for shingle in shingles],
+        dtype=np.uint64,
+    )
+
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return [int(value) for value in permuted.min(axis=1)]
+
+
+def compute_lsh_bands(signature: list[int]) -> list[int]:
+    """
+    Hash each band of a MinHash signature into a signed 64-bit bucket id.
+
+    Two signatures share a bucket when all rows of one of their bands match,
+    which is likely once their Jaccard similarity is high.
+    """
+    bands = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        data = f"{band}:" + ",".join(str(row) for row in rows)
+        bands.append(_hash_bytes(data.encode("utf-8"), signed=True))
+    return bands
+
+
+def estimate_similarity(signature: list[int], other_signature: list[int]) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their MinHash signatures.
+    """
+    return float(np.mean(np.array(signature) == np.array(other_signature)))
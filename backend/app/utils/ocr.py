@@ -0,0 +1,41 @@
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def find_pages_without_text(text_lengths: list[int]) -> list[int]:
+    """
+    Return the 0-based numbers of pages whose text layer has fewer than OCR_MIN_PAGE_CHARS characters.
+
+    Args:
+        text_lengths (list): Text layer length of each page, from get_page_text_lengths.
+    """
+    return [
+        page_number
+        for page_number, length in enumerate(text_lengths)
+        if length < settings.OCR_MIN_PAGE_CHARS
+    ]
+
+
+def ocr_pages(input_path: str, output_path: str, pages: list[int]):
+    """
+    OCR only the given pages of a PDF, in parallel, and write the result to output_path.
+
+    Pages that already have text are left untouched, so the original text layer is kept.
+    """
+    import ocrmypdf
+
+    start = time.perf_counter()
+    ocrmypdf.ocr(
+        input_path,
+        output_path,
+        pages=",".join(str(page_number + 1) for page_number in pages),
+        skip_text=True,
+        jobs=settings.OCR_JOBS,
+        use_threads=True,
+        progress_bar=False,
+    )
+    logger.info(f"OCR of {len(pages)} pages of {input_path} finished in {time.perf_counter() - start:.2f}s")
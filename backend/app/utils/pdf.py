@@ -0,0 +1,54 @@
+import os
+
+from PyPDF2 import PdfReader, PdfWriter
+
+
+def get_page_count(file_path: str) -> int:
+    """
+    Return the number of pages in a PDF file.
+    """
+    return len(PdfReader(file_path).pages)
+
+
+def get_page_text_lengths(file_path: str) -> list[int]:
+    """
+    Return the number of non-whitespace characters in each page's text layer.
+    """
+    lengths = []
+    for page in PdfReader(file_path).pages:
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        lengths.append(len("".join(text.split())))
+    return lengths
+
+
+def get_page_ranges(page_count: int, pages_per_range: int) -> list[tuple[int, int]]:
+    """
+    Split a page count into consecutive (start, end) ranges, end exclusive.
+    """
+    return [
+        (start, min(start + pages_per_range, page_count))
+        for start in range(0, page_count, pages_per_range)
+    ]
+
+
+def split_pdf(file_path: str, page_ranges: list[tuple[int, int]], output_dir: str) -> list[str]:
+    """
+    Write each page range of a PDF to its own file and return the file paths in order.
+    """
+    reader = PdfReader(file_path)
+    paths = []
+
+    for start, end in page_ranges:
+        writer = PdfWriter()
+        for page_number in range(start, end):
+            writer.add_page(reader.pages[page_number])
+
+        path = os.path.join(output_dir, f"pages_{start + 1}-{end}.pdf")
+        with open(path, "wb") as output:
+            writer.write(output)
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,163 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import F
+from django.utils import timezone
+
+from ..constant import DocumentStatus, StageStatus
+from ..models import Document, DocumentChunk, ProcessingRun
+from .stats import get_percentile
+
+logger = logging.getLogger(__name__)
+
+# Completed runs per stage used for the percentiles
+RECENT_RUNS = 1000
+
+_token_usage = ContextVar("ollama_token_usage", default=None)
+
+
+def start_stage_run(doc_id, stage, task=None, **fields):
+    """
+    Record the start of a stage for a document; doc_id may be None for
+    stages that serve several documents at once.
+    """
+    return ProcessingRun.objects.create(
+        document_id=doc_id,
+        stage=stage,
+        task_id=task.request.id if task else None,
+        worker=task.request.hostname if task else None,
+        **fields,
+    )
+
+
+def finish_stage_run(run, failed=False, **fields):
+    """
+    Record the end of a stage run with its outcome and final counters.
+    """
+    finished_at = timezone.now()
+    ProcessingRun.objects.filter(id=run.id).update(
+        status=(StageStatus.FAILED if failed else StageStatus.COMPLETED).value,
+        finished_at=finished_at,
+        duration_seconds=(finished_at - run.started_at).total_seconds(),
+        **fields,
+    )
+
+
+@contextmanager
+def track_token_usage(run):
+    """
+    Add the tokens reported by Ollama calls made inside the block to a run.
+    """
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    reset_token = _token_usage.set(usage)
+    try:
+        yield
+    finally:
+        _token_usage.reset(reset_token)
+        if any(usage.values()):
+            ProcessingRun.objects.filter(id=run.id).update(
+                prompt_tokens=F('prompt_tokens') + usage["prompt_tokens"],
+                completion_tokens=F('completion_tokens') + usage["completion_tokens"],
+            )
+
+
+def add_token_usage(usage_metadata):
+    """
+    Count the usage metadata of a chat response towards the tracked run, if any.
+    """
+    usage = _token_usage.get()
+    if usage is None or not usage_metadata:
+        return
+    usage["prompt_tokens"] += usage_metadata.get("input_tokens", 0)
+    usage["completion_tokens"] += usage_metadata.get("output_tokens", 0)
+
+
+def get_median_rate(runs, unit_field):
+    """
+    Median seconds per page or per chunk over runs that processed any.
+    """
+    rates = [run["duration_seconds"] / run[unit_field] for run in runs if run[unit_field]]
+    return get_percentile(rates, 50)
+
+
+def get_stage_stats():
+    """
+    Aggregate the recent completed runs of every stage.
+    """
+    stats = {}
+    stages = ProcessingRun.objects.values_list('stage', flat=True).distinct()
+    for stage in stages:
+        runs = list(
+            ProcessingRun.objects.filter(stage=stage, status=StageStatus.COMPLETED.value)
+            .order_by('-finished_at')
+            .values('duration_seconds', 'no_of_pages', 'no_of_chunks', 'prompt_tokens', 'completion_tokens')[:RECENT_RUNS]
+        )
+        durations = [run["duration_seconds"] for run in runs]
+        stats[stage] = {
+            "runs": len(runs),
+            "failed": ProcessingRun.objects.filter(stage=stage, status=StageStatus.FAILED.value).count(),
+            "running": ProcessingRun.objects.filter(stage=stage, status=StageStatus.RUNNING.value).count(),
+            "average_seconds": sum(durations) / len(durations) if durations else None,
+            "p50_seconds": get_percentile(durations, 50),
+            "p90_seconds": get_percentile(durations, 90),
+            "p95_seconds": get_percentile(durations, 95),
+            "p99_seconds": get_percentile(durations, 99),
+            "seconds_per_page": get_median_rate(runs, "no_of_pages"),
+            "seconds_per_chunk": get_median_rate(runs, "no_of_chunks"),
+            "prompt_tokens": sum(run["prompt_tokens"] for run in runs),
+            "completion_tokens": sum(run["completion_tokens"] for run in runs),
+        }
+    return stats
+
+
+def estimate_remaining_seconds(doc_instance, stats):
+    """
+    Estimate how long an in-flight document still needs from the stage medians.
+
+    Extraction is scaled by the pages left, embedding by the chunks without a
+    vector; embedding and summary run in parallel after extraction.
+    """
+    def rate(stage, key):
+        return (stats.get(stage) or {}).get(key) or 0
+
+    extracting = doc_instance.status in (DocumentStatus.PENDING.value, DocumentStatus.TEXT_EXTRACTING.value)
+
+    extraction = 0
+    if extracting:
+        pages_left = doc_instance.no_of_pages - doc_instance.no_of_pages_processed
+        extraction = (
+            pages_left * rate("extraction", "seconds_per_page")
+            if pages_left > 0 else rate("extraction", "p50_seconds")
+        )
+
+    embedding = 0
+    if doc_instance.embedding_status != StageStatus.COMPLETED.value:
+        if extracting:
+            embedding = rate("embedding", "p50_seconds")
+        else:
+            chunks_left = DocumentChunk.objects.filter(document=doc_instance, embedding_vector__isnull=True).count()
+            embedding = chunks_left * rate("embedding", "seconds_per_chunk")
+
+    summary = 0
+    if doc_instance.summary_status != StageStatus.COMPLETED.value:
+        summary = rate("summary", "p50_seconds")
+
+    return extraction + max(embedding, summary)
+
+
+def get_in_flight_estimates(stats, limit=100):
+    documents = (
+        Document.objects.filter(is_failed=False, task_id__isnull=False)
+        .exclude(status=DocumentStatus.COMPLETED.value)
+        .order_by('created_at')[:limit]
+    )
+    return [
+        {
+            "id": document.id,
+            "title": document.title,
+            "status": document.status,
+            "estimated_seconds_remaining": round(estimate_remaining_seconds(document, stats), 1),
+        }
+        for document in documents
+    ]
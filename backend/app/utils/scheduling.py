@@ -0,0 +1,82 @@
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from ..constant import DocumentStatus, MarkdownConverter
+from ..models import Document
+from .pdf import get_page_count
+
+logger = logging.getLogger(__name__)
+
+# Pages assumed per megabyte when the page count of a file cannot be read
+PAGES_PER_MB = 10
+
+
+def estimate_processing_cost(page_count, file_size, converter):
+    """
+    Estimate the seconds of worker time a document needs to go through the pipeline.
+    """
+    if converter == MarkdownConverter.MARKITDOWN.value:
+        seconds_per_page = settings.MARKITDOWN_SECONDS_PER_PAGE
+    else:
+        # Marker, and "auto" which cannot be resolved without reading every page
+        seconds_per_page = settings.MARKER_SECONDS_PER_PAGE
+
+    if not page_count:
+        page_count = max(int(file_size / 1024 ** 2 * PAGES_PER_MB), 1)
+
+    return settings.PIPELINE_BASE_SECONDS + page_count * seconds_per_page
+
+
+def get_priority(cost):
+    """
+    Map an estimated cost to a Celery priority; with Redis, 0 is served first.
+    """
+    for priority, threshold in zip((0, 3, 6), settings.PRIORITY_COST_THRESHOLDS):
+        if cost < threshold:
+            return priority
+    return 9
+
+
+def estimate_document_cost(doc_instance):
+    """
+    Fill in the page count, estimated cost and priority of a stored document.
+    """
+    full_path = os.path.join(settings.MEDIA_ROOT, doc_instance.file)
+    file_size = os.path.getsize(full_path)
+    try:
+        doc_instance.no_of_pages = get_page_count(full_path)
+    except Exception as e:
+        logger.warning(f"Could not read the page count of Document ID {doc_instance.id}: {str(e)}")
+
+    doc_instance.estimated_cost = estimate_processing_cost(
+        doc_instance.no_of_pages, file_size, doc_instance.markdown_converter
+    )
+    doc_instance.priority = get_priority(doc_instance.estimated_cost)
+    doc_instance.save(update_fields=["no_of_pages", "estimated_cost", "priority"])
+
+
+def estimate_completion_time(doc_instance):
+    """
+    Estimate when a document will be processed from the cost queued ahead of it.
+
+    Unfinished documents with the same or a more urgent priority are ahead of
+    it; their cost is shared by the extraction worker processes.
+    """
+    cost_ahead = (
+        Document.objects.filter(
+            is_failed=False,
+            priority__lte=doc_instance.priority,
+            created_at__lte=doc_instance.created_at,
+        )
+        .exclude(status=DocumentStatus.COMPLETED.value)
+        .exclude(id=doc_instance.id)
+        .aggregate(total=Sum('estimated_cost'))['total']
+    ) or 0
+
+    seconds = cost_ahead / max(settings.EXTRACTION_WORKER_CONCURRENCY, 1) + doc_instance.estimated_cost
+    return timezone.now() + timedelta(seconds=seconds)
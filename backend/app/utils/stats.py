@@ -0,0 +1,12 @@
+def get_percentile(values, percentile):
+    """
+    Return the nearest-rank percentile of values, or None when there are none.
+
+    Args:
+        values (iterable): The measurements, in any order.
+        percentile (float): The percentile to return, from 0 to 100.
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(int(len(values) * percentile / 100), len(values) - 1)]
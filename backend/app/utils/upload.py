@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import os
 
@@ -11,6 +12,9 @@ class UploadUtils:
     def upload_document(file, id):
         """
         Upload a document file and save it to the media root.
+
+        Returns:
+            tuple: The saved file path and the SHA-256 hex digest of its content.
         """
         try:
             file_name = f"{id}_original.pdf"
@@ -20,9 +24,11 @@ class UploadUtils:
             directory = os.path.join(settings.MEDIA_ROOT, 'docs', str(id))
             os.makedirs(directory, exist_ok=True)
             
-            # Use chunks for memory efficiency
+            # Use chunks for memory efficiency, hashing them as they are written
+            file_hash = hashlib.sha256()
             with default_storage.open(file_path, 'wb+') as destination:
                 for chunk in file.chunks():
+                    file_hash.update(chunk)
                     destination.write(chunk)
             
             # Verify file was saved correctly
@@ -30,13 +36,52 @@ class UploadUtils:
             if not os.path.exists(full_path):
                 raise IOError(f"File failed to save at {full_path}")
             
-            return file_path
+            return file_path, file_hash.hexdigest()
             
         except Exception as e:
             logger.error(f"Error uploading document {id}: {str(e)}")
             raise
     
 
+    @staticmethod
+    def import_document(source_path, id, link=True):
+        """
+        Place a file from the local filesystem at a document's storage path.
+
+        The file is hard-linked when possible so large imports do not double the
+        disk usage, and copied otherwise (e.g. across filesystems).
+
+        Returns:
+            tuple: The stored file path and the SHA-256 hex digest of its content.
+        """
+        file_path = os.path.join('docs', str(id), f"{id}_original.pdf")
+        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+        linked = False
+        if link:
+            try:
+                os.link(source_path, full_path)
+                linked = True
+            except OSError:
+                pass
+
+        file_hash = hashlib.sha256()
+        with open(source_path, 'rb') as source:
+            if linked:
+                for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                    file_hash.update(chunk)
+            else:
+                with open(full_path, 'wb') as destination:
+                    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                        file_hash.update(chunk)
+                        destination.write(chunk)
+
+        return file_path, file_hash.hexdigest()
+
     @staticmethod
     def upload_ocr_document(file, id):
         """
@@ -0,0 +1,61 @@
+import logging
+
+from django.db import connection
+
+from ..models import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_NAME = 'embedding_vector_index'
+
+
+def get_vector_index_state() -> str:
+    """
+    Return "ready", "building" (present but not yet valid) or "missing" for the HNSW index.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT index.indisvalid FROM pg_index AS index "
+            "JOIN pg_class AS class ON class.oid = index.indexrelid "
+            "WHERE class.relname = %s",
+            [VECTOR_INDEX_NAME],
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        return "missing"
+    return "ready" if row[0] else "building"
+
+
+def get_vector_index_warning():
+    """
+    Return a warning when vector searches cannot use the HNSW index, otherwise None.
+    """
+    state = get_vector_index_state()
+    if state == "ready":
+        return None
+
+    message = f"Vector index is {state}; searches fall back to an exact scan and may be slow"
+    logger.warning(message)
+    return message
+
+
+def drop_vector_index():
+    # CONCURRENTLY cannot run inside a transaction; the connection is in autocommit
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}")
+
+
+def build_vector_index(maintenance_work_mem: str, parallel_workers: int):
+    """
+    (Re)build the HNSW index concurrently with the given build memory and parallel workers.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('maintenance_work_mem', %s, false)", [maintenance_work_mem])
+        cursor.execute("SELECT set_config('max_parallel_maintenance_workers', %s, false)", [str(parallel_workers)])
+        # A failed concurrent build leaves an invalid index behind
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}")
+        cursor.execute(
+            f"CREATE INDEX CONCURRENTLY {VECTOR_INDEX_NAME} ON {DocumentChunk._meta.db_table} "
+            "USING hnsw (embedding_vector vector_cosine_ops) WITH (m = 16, ef_construction = 128)"
+        )
@@ -1,6 +1,5 @@
 import logging
 
-from celery import chain
 from celery.result import AsyncResult
 from django.db.models import F
 from django.http import FileResponse, StreamingHttpResponse
@@ -10,14 +9,19 @@ from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
-from .constant import DocumentStatus
+from .constant import DocumentStatus, OllamaPriority, StageStatus
 from .models import Document, DocumentChunk
 from .serializers import DocumentChunkSerializer, DocumentSerializer
 from .services.ollama import EMBEDDING_MODEL, CHAT_LLM
-from .tasks.tasks import (embed_text_task, generate_summary_task,
-                          save_chunks_task)
+from .services.ollama_scheduler import get_scheduler_stats, ollama_slot
+from .tasks.tasks import build_document_pipeline, start_document_processing
+from .utils.document_lease import get_held_stages
+from .utils.embedding_cache import get_cache_stats
 from .utils.extractor import combine_chunks
+from .utils.processing_runs import get_in_flight_estimates, get_stage_stats
+from .utils.scheduling import estimate_completion_time
 from .utils.upload import UploadUtils
+from .utils.vector_index import get_vector_index_warning
 
 logger = logging.getLogger(__name__)
 
@@ -59,21 +63,20 @@ def upload_doc(request):
         if serializer.is_valid():
             document = serializer.save(file=None)
 
-            document.file = UploadUtils.upload_document(file, str(document.id))
+            document.file, document.file_hash = UploadUtils.upload_document(file, str(document.id))
             document.markdown_converter = markdown_converter
             document.save()
-            
-            task_chain = chain(
-                save_chunks_task.s(document.id),
-                generate_summary_task.s(),
-                embed_text_task.s()
-            )
 
-            result = task_chain.apply_async()
+            result = start_document_processing(document)
             document.task_id = result.id
-            document.save()
-
-            response_data.append({"status": "success", "id": document.id, "filename": file.name})
+            # Only task_id: the pipeline may already be updating the other fields
+            document.save(update_fields=["task_id"])
+
+            response = {"status": "success", "id": document.id, "filename": file.name}
+            if document.estimated_cost is not None:
+                response["priority"] = document.priority
+                response["estimated_completion_at"] = estimate_completion_time(document)
+            response_data.append(response)
         else:
             logger.error(f"Document upload failed for {file.name}: {serializer.errors}")
             response_data.append({"status": "error", "filename": file.name, "errors": serializer.errors})
@@ -108,6 +111,76 @@ def get_doc_raw(request, doc_id):
     file_path = UploadUtils.get_document_file(doc_id, 'original')
     return FileResponse(open(file_path, 'rb'))
 
+@api_view(['GET'])
+def get_doc_status(request, doc_id):
+    """
+    Retrieve the processing status of a document, including embedding progress.
+    """
+    try:
+        document = Document.objects.get(id=doc_id)
+    except Document.DoesNotExist:
+        logger.warning(f"Document not found: {doc_id}")
+        return Response({"status": "error", "message": "Document not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    chunks = DocumentChunk.objects.filter(document=document)
+
+    return Response({
+        "id": document.id,
+        "status": document.status,
+        "is_failed": document.is_failed,
+        "no_of_chunks": document.no_of_chunks,
+        "no_of_pages": document.no_of_pages,
+        "no_of_pages_processed": document.no_of_pages_processed,
+        "boilerplate_chars_removed": document.boilerplate_chars_removed,
+        "boilerplate_chunks_saved": document.boilerplate_chunks_saved,
+        "no_of_embedded_chunks": chunks.filter(embedding_vector__isnull=False).count(),
+        "summary_status": document.summary_status,
+        "embedding_status": document.embedding_status,
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def embedding_cache_stats(request):
+    """
+    Retrieve hit/miss counters for the chunk embedding cache.
+    """
+    try:
+        return Response(get_cache_stats(), status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error retrieving embedding cache stats: {str(e)}")
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def ollama_scheduler_stats(request):
+    """
+    Retrieve wait-time metrics and slot usage of the Ollama scheduler.
+    """
+    try:
+        return Response(get_scheduler_stats(), status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error retrieving Ollama scheduler stats: {str(e)}")
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def processing_stats(request):
+    """
+    Retrieve duration percentiles per pipeline stage and the estimated
+    remaining time of the documents still being processed.
+    """
+    try:
+        limit = int(request.query_params.get('limit', 100))
+    except ValueError:
+        limit = 100
+
+    try:
+        stats = get_stage_stats()
+        return Response({
+            "stages": stats,
+            "in_flight": get_in_flight_estimates(stats, limit=limit),
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error retrieving processing stats: {str(e)}")
+        return Response({"status": "error", "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])  
 def get_doc_markdown(request, doc_id):
     """
@@ -256,20 +329,33 @@ def get_doc_original_file(request, doc_id):
         logger.error(f"Error retrieving file: {str(e)}")
         return Response({"status": "error", "message": f"Error retrieving {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def get_ingestion_progress(document):
+    """
+    Percentage of a document's pages that have been converted and made searchable.
+    """
+    if document.status == DocumentStatus.COMPLETED.value:
+        return 100
+    if not document.no_of_pages:
+        return 0
+    return round(document.no_of_pages_processed * 100 / document.no_of_pages)
+
 @api_view(['GET'])
 def search_docs(request):
     """
     Search documents using vector similarity and optional keyword filtering.
     Merges chunks from the same document and includes them in the response.
+    Documents that are still being ingested are included with their progress.
 
     Expected query parameters:
     - query: search text (required)
     - title: optional title substring filter
     - limit: max number of results (default 10)
+    - collapse_duplicates: when "true", near-duplicate chunks are returned only once
     """
     query = request.GET.get('query')
     title_filter = request.GET.get('title')
     limit = request.GET.get('limit', 10)
+    collapse_duplicates = request.GET.get('collapse_duplicates', '').lower() == 'true'
 
     # Validate required parameters
     if not query:
@@ -285,22 +371,35 @@ def search_docs(request):
 
     try:
         # Generate embedding for the search query
-        query_embedding = EMBEDDING_MODEL.embed_query(query)
+        with ollama_slot(EMBEDDING_MODEL.model, OllamaPriority.INTERACTIVE):
+            query_embedding = EMBEDDING_MODEL.embed_query(query)
 
         # Base queryset with select_related to avoid N+1 queries on document access
-        chunks_queryset = DocumentChunk.objects.select_related('document')
+        # Chunks of documents still streaming in have no vector yet
+        chunks_queryset = DocumentChunk.objects.select_related('document').filter(embedding_vector__isnull=False)
 
         # Apply optional title filter if provided
         if title_filter:
             chunks_queryset = chunks_queryset.filter(document__title__icontains=title_filter)
 
         # Vector similarity search using pgvector's CosineDistance
+        # Over-fetch when collapsing so duplicates don't eat into the limit
         chunks = (
             chunks_queryset
             .annotate(distance=CosineDistance(F('embedding_vector'), query_embedding))
-            .order_by('distance')[:limit]
+            .order_by('distance')[:limit * 3 if collapse_duplicates else limit]
         )
 
+        if collapse_duplicates:
+            seen_chunk_ids = set()
+            unique_chunks = []
+            for chunk in chunks:
+                canonical_id = chunk.duplicate_of_id or chunk.id
+                if canonical_id not in seen_chunk_ids:
+                    seen_chunk_ids.add(canonical_id)
+                    unique_chunks.append(chunk)
+            chunks = unique_chunks[:limit]
+
         # Group chunks by document and merge into single entries
         document_chunks = {}
         for chunk in chunks:
@@ -313,6 +412,8 @@ def search_docs(request):
                     'document_id': doc_id,
                     'document_title': chunk.document.title,
                     'created_at': chunk.document.created_at,
+                    'status': chunk.document.status,
+                    'progress': get_ingestion_progress(chunk.document),
                     'distance': chunk.distance,
                     'chunks': []
                 }
@@ -326,7 +427,11 @@ def search_docs(request):
         # sort by distance - lowest first
         response_data.sort(key=lambda x: x['distance'])
 
-        return Response(response_data, status=status.HTTP_200_OK)
+        response = Response(response_data, status=status.HTTP_200_OK)
+        index_warning = get_vector_index_warning()
+        if index_warning:
+            response['X-Search-Warning'] = index_warning
+        return response
 
     except Exception as e:
         logger.error("Search error: %s", str(e), exc_info=True)
@@ -352,7 +457,8 @@ def chat_with_docs(request):
 
     try:
         # Embed the query
-        query_embedding = EMBEDDING_MODEL.embed_query(query)
+        with ollama_slot(EMBEDDING_MODEL.model, OllamaPriority.INTERACTIVE):
+            query_embedding = EMBEDDING_MODEL.embed_query(query)
 
         if query_embedding is None:
             return Response(
@@ -363,7 +469,8 @@ def chat_with_docs(request):
         # Retrieve top 10 similar chunks using vector search
         # Replace ORM-based search with a dedicated vector database for faster retrieval
         chunks_with_distance = (
-            DocumentChunk.objects.annotate(
+            DocumentChunk.objects.filter(embedding_vector__isnull=False)
+            .annotate(
                 cosine_distance=CosineDistance(F('embedding_vector'), query_embedding)
             )
             .order_by('cosine_distance')[:10]
@@ -421,15 +528,20 @@ def chat_with_docs(request):
 
         def stream_response():
             response_text = ""
-            for chunk in CHAT_LLM.stream(messages):
-                if hasattr(chunk, 'content') and chunk.content:
-                    response_text += chunk.content
-                    yield chunk.content
+            with ollama_slot(CHAT_LLM.model, OllamaPriority.INTERACTIVE):
+                for chunk in CHAT_LLM.stream(messages):
+                    if hasattr(chunk, 'content') and chunk.content:
+                        response_text += chunk.content
+                        yield chunk.content
 
-        return StreamingHttpResponse(
+        response = StreamingHttpResponse(
             stream_response(),
             content_type='application/json'
         )
+        index_warning = get_vector_index_warning()
+        if index_warning:
+            response['X-Search-Warning'] = index_warning
+        return response
 
     except Exception as e:
         logger.error(f"Chat error: {str(e)}", exc_info=True)
@@ -452,21 +564,20 @@ def retry_doc_processing(request, doc_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create task chain based on current status
-        tasks = []
+        held_stages = get_held_stages(document.id)
+        if held_stages:
+            return Response(
+                {"status": "error", "message": f"Document is still being processed ({', '.join(held_stages)})"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        # Rerun extraction if it never finished, otherwise only the failed branches
         current_status = DocumentStatus(document.status)
+        extract = current_status in [DocumentStatus.PENDING, DocumentStatus.TEXT_EXTRACTING]
+        summarize = extract or document.summary_status != StageStatus.COMPLETED.value
+        embed = extract or document.embedding_status != StageStatus.COMPLETED.value
 
-        if current_status in [DocumentStatus.PENDING, DocumentStatus.TEXT_EXTRACTING]:
-            tasks.append(save_chunks_task.s(document.id))
-            tasks.append(generate_summary_task.s())
-            tasks.append(embed_text_task.s())
-        elif current_status in [DocumentStatus.TEXT_EXTRACTED, DocumentStatus.GENERATING_SUMMARY]:
-            tasks.append(generate_summary_task.s(document.id))
-            tasks.append(embed_text_task.s())
-        elif current_status in [DocumentStatus.SUMMARY_GENERATED, DocumentStatus.EMBEDDING_TEXT]:
-            tasks.append(embed_text_task.s(document.id))
-
-        if not tasks:
+        if not (summarize or embed):
             return Response(
                 {"status": "error", "message": "No tasks to retry"}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -474,14 +585,17 @@ def retry_doc_processing(request, doc_id):
 
         # Reset failed status
         document.is_failed = False
-        
-        # Create and execute task chain
-        task_chain = chain(*tasks)
-        result = task_chain.apply_async()
+        document.save(update_fields=["is_failed"])
+
+        # Create and execute the pipeline
+        pipeline = build_document_pipeline(
+            document.id, extract=extract, summarize=summarize, embed=embed, priority=document.priority
+        )
+        result = pipeline.apply_async()
         
         # Update document with new task ID
         document.task_id = result.id
-        document.save()
+        document.save(update_fields=["task_id"])
 
         return Response({
             "status": "success",
@@ -530,7 +644,8 @@ def chat_with_single_doc(request, doc_id):
             )
 
         # Embed the query
-        query_embedding = EMBEDDING_MODEL.embed_query(query)
+        with ollama_slot(EMBEDDING_MODEL.model, OllamaPriority.INTERACTIVE):
+            query_embedding = EMBEDDING_MODEL.embed_query(query)
 
         if query_embedding is None:
             return Response(
@@ -540,7 +655,7 @@ def chat_with_single_doc(request, doc_id):
 
         # Retrieve top 10 similar chunks from this specific document
         chunks_with_distance = (
-            DocumentChunk.objects.filter(document_id=doc_id)
+            DocumentChunk.objects.filter(document_id=doc_id, embedding_vector__isnull=False)
             .annotate(
                 cosine_distance=CosineDistance(F('embedding_vector'), query_embedding)
             )
@@ -589,15 +704,20 @@ def chat_with_single_doc(request, doc_id):
 
         def stream_response():
             response_text = ""
-            for chunk in CHAT_LLM.stream(messages):
-                if hasattr(chunk, 'content') and chunk.content:
-                    response_text += chunk.content
-                    yield chunk.content
+            with ollama_slot(CHAT_LLM.model, OllamaPriority.INTERACTIVE):
+                for chunk in CHAT_LLM.stream(messages):
+                    if hasattr(chunk, 'content') and chunk.content:
+                        response_text += chunk.content
+                        yield chunk.content
 
-        return StreamingHttpResponse(
+        response = StreamingHttpResponse(
             stream_response(),
             content_type='application/json'
         )
+        index_warning = get_vector_index_warning()
+        if index_warning:
+            response['X-Search-Warning'] = index_warning
+        return response
 
     except Exception as e:
         logger.error(f"Single document chat error: {str(e)}", exc_info=True)
@@ -0,0 +1,186 @@
+import logging
+import math
+import os
+import time
+
+import redis
+from celery.worker.autoscale import Autoscaler
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RECENT_DURATIONS = 100
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+    return _broker
+
+
+def get_duration_key(queue):
+    return f"autoscale:durations:{queue}"
+
+
+def record_task_duration(queue, seconds):
+    """
+    Keep the most recent task durations of a queue for the autoscaler.
+    """
+    try:
+        pipeline = get_broker().pipeline()
+        pipeline.lpush(get_duration_key(queue), seconds)
+        pipeline.ltrim(get_duration_key(queue), 0, RECENT_DURATIONS - 1)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not record task duration for queue {queue}: {str(e)}")
+
+
+def get_backlog(queue):
+    """
+    Count the messages waiting in a queue, across its Redis priority lists.
+    """
+    sep = settings.CELERY_BROKER_TRANSPORT_OPTIONS.get('sep', ':')
+    steps = settings.CELERY_BROKER_TRANSPORT_OPTIONS.get('priority_steps', [0])
+
+    pipeline = get_broker().pipeline()
+    for priority in steps:
+        pipeline.llen(f"{queue}{sep}{priority}" if priority else queue)
+    return sum(pipeline.execute())
+
+
+def get_average_duration(queue):
+    durations = [float(value) for value in get_broker().lrange(get_duration_key(queue), 0, -1)]
+    return sum(durations) / len(durations) if durations else None
+
+
+def get_available_memory_mb():
+    """
+    Return MemAvailable from /proc/meminfo, or None where it cannot be read.
+    """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def get_child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def get_resident_memory_mb(pid):
+    """
+    Return the resident memory of a process and its descendants, such as the
+    conversion pool a prefork child starts for large PDFs.
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024 ** 2
+    except (OSError, ValueError):
+        return 0
+    return rss + sum(get_resident_memory_mb(child) for child in get_child_pids(pid))
+
+
+class QueueDepthAutoscaler(Autoscaler):
+    """
+    Sizes the pool from the backlog of the queues the worker consumes.
+
+    The target is the number of processes that would drain the backlog within
+    AUTOSCALE_DRAIN_SECONDS at the measured average task duration. It is capped
+    by --autoscale and by how many more processes fit in the available memory,
+    which matters most for the Marker extraction workers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_decision = None
+
+    def body(self):
+        with self.mutex:
+            self.maybe_scale()
+        time.sleep(settings.AUTOSCALE_INTERVAL)
+
+    @property
+    def queues(self):
+        return sorted(self.worker.app.amqp.queues.consume_from)
+
+    def get_process_memory_mb(self):
+        if settings.EXTRACTION_QUEUE in self.queues:
+            estimate = settings.AUTOSCALE_MARKER_PROCESS_MB
+        else:
+            estimate = settings.AUTOSCALE_PROCESS_MB
+
+        # Trust the measured size of the running processes when they are bigger
+        processes = getattr(getattr(self.pool, '_pool', None), '_pool', None) or []
+        measured = [get_resident_memory_mb(process.pid) for process in processes]
+        measured = [rss for rss in measured if rss]
+        if measured:
+            estimate = max(estimate, sum(measured) // len(measured))
+        return estimate
+
+    def get_memory_ceiling(self):
+        available = get_available_memory_mb()
+        if available is None:
+            return self.max_concurrency
+        spare = max(available - settings.AUTOSCALE_MEMORY_RESERVE_MB, 0)
+        return self.processes + spare // self.get_process_memory_mb()
+
+    def get_target(self):
+        backlog = sum(get_backlog(queue) for queue in self.queues)
+        durations = [duration for duration in map(get_average_duration, self.queues) if duration]
+        average_duration = sum(durations) / len(durations) if durations else None
+
+        pending = backlog + self.qty
+        if average_duration is None:
+            # No measurements yet: one process per pending task
+            wanted = pending
+        else:
+            wanted = math.ceil(pending * average_duration / settings.AUTOSCALE_DRAIN_SECONDS)
+
+        memory_ceiling = self.get_memory_ceiling()
+        target = max(min(wanted, self.max_concurrency, memory_ceiling), self.min_concurrency)
+        return target, {
+            "backlog": backlog,
+            "reserved": self.qty,
+            "average_duration": average_duration,
+            "wanted": wanted,
+            "memory_ceiling": memory_ceiling,
+        }
+
+    def _maybe_scale(self, req=None):
+        try:
+            target, reasons = self.get_target()
+        except Exception as e:
+            logger.warning(f"Autoscaler could not read the queues, keeping {self.processes} processes: {str(e)}")
+            return False
+
+        procs = self.processes
+        decision = (procs, target)
+        if target != procs and decision != self._last_decision:
+            duration = reasons["average_duration"]
+            logger.info(
+                f"Autoscaler {','.join(self.queues)}: {procs} -> {target} processes "
+                f"(backlog {reasons['backlog']}, reserved {reasons['reserved']}, "
+                f"avg task {f'{duration:.1f}s' if duration else 'unknown'}, wanted {reasons['wanted']}, "
+                f"memory ceiling {reasons['memory_ceiling']}, limits {self.min_concurrency}-{self.max_concurrency})"
+            )
+        self._last_decision = decision
+
+        if target > procs:
+            self.scale_up(target - procs)
+            return True
+        if target < procs:
+            # Scaling down waits for the keepalive after the last scale up
+            self.scale_down(procs - target)
+            return True
+        return False
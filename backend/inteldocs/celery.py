@@ -1,7 +1,10 @@
-
 from __future__ import absolute_import, unicode_literals
 import os
+import time
 from celery import Celery
+from celery.signals import (task_postrun, task_prerun, worker_init,
+                            worker_process_init, worker_process_shutdown,
+                            worker_shutdown)
 from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inteldocs.settings')
@@ -12,3 +15,48 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
+
+def consumes_extraction_queue(celery_app):
+    # Embedding and summary workers never convert, so they skip the Marker models
+    return settings.EXTRACTION_QUEUE in celery_app.amqp.queues.consume_from
+
+
+@worker_init.connect
+def preload_marker_before_fork(sender=None, **kwargs):
+    # Loaded in the parent so prefork children share the weights copy-on-write
+    if settings.MARKER_PRELOAD == 'worker' and consumes_extraction_queue(sender.app):
+        from app.services.marker import load_pdf_converter
+        load_pdf_converter()
+
+
+@worker_process_init.connect
+def preload_marker_in_child(**kwargs):
+    if settings.MARKER_PRELOAD == 'process' and consumes_extraction_queue(app):
+        from app.services.marker import load_pdf_converter
+        load_pdf_converter()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_conversion_pool(**kwargs):
+    # The pool's processes must not outlive a child recycled by --max-memory-per-child
+    from app.utils.converter import shutdown_conversion_pool
+    shutdown_conversion_pool()
+
+
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, **kwargs):
+    # Measured durations let the autoscaler turn a backlog into a process count
+    started = _task_started.pop(task_id, None)
+    queue = (task.request.delivery_info or {}).get('routing_key')
+    if started is not None and queue:
+        from inteldocs.autoscale import record_task_duration
+        record_task_duration(queue, time.perf_counter() - started)
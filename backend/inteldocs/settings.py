@@ -139,3 +139,145 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# When to load the Marker models in Celery workers:
+# "worker" loads them once in the parent before the pool forks,
+# "process" loads them in each pool process at startup,
+# "lazy" loads them on the first conversion.
+# Only workers that consume EXTRACTION_QUEUE preload them.
+MARKER_PRELOAD = os.getenv('MARKER_PRELOAD', 'lazy')
+
+# Number of chunks sent to the embedding model per request
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+
+# Documents with fewer pending chunks than a full batch are handed to a
+# cross-document batcher, which waits at most this many seconds to fill a batch
+EMBEDDING_BATCH_MAX_WAIT = int(os.getenv('EMBEDDING_BATCH_MAX_WAIT', '10'))
+
+REDIS_URL = os.getenv('REDIS_URL', CELERY_BROKER_URL)
+
+# Maximum number of cached chunk embeddings kept in Postgres; 0 disables the cache
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '200000'))
+
+# PDFs with at least this many pages are converted as page ranges on a process pool; 0 disables
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv('PDF_PARALLEL_PAGE_THRESHOLD', '100'))
+PDF_PARALLEL_PAGES_PER_RANGE = int(os.getenv('PDF_PARALLEL_PAGES_PER_RANGE', '25'))
+PDF_CONVERSION_WORKERS = int(os.getenv('PDF_CONVERSION_WORKERS', '2'))
+
+# PDFs at or above PDF_PARALLEL_PAGE_THRESHOLD are converted, chunked, saved and
+# embedded one window of pages at a time, so they become searchable while ingesting.
+# The default window is one batch of the conversion pool; 0 disables
+STREAMING_WINDOW_PAGES = int(os.getenv(
+    'STREAMING_WINDOW_PAGES', str(PDF_PARALLEL_PAGES_PER_RANGE * PDF_CONVERSION_WORKERS)
+))
+
+# Pages whose text layer has fewer characters than this are OCR'd with ocrmypdf before conversion
+OCR_ENABLED = os.getenv('OCR_ENABLED', 'true').lower() == 'true'
+OCR_MIN_PAGE_CHARS = int(os.getenv('OCR_MIN_PAGE_CHARS', '20'))
+OCR_JOBS = int(os.getenv('OCR_JOBS', str(os.cpu_count() or 1)))
+
+# "auto" converter mode: PDFs with a dense text layer on nearly every page use
+# MarkItDown, everything else uses Marker
+AUTO_CONVERTER_MIN_CHARS_PER_PAGE = int(os.getenv('AUTO_CONVERTER_MIN_CHARS_PER_PAGE', '200'))
+AUTO_CONVERTER_MAX_IMAGE_PAGE_SHARE = float(os.getenv('AUTO_CONVERTER_MAX_IMAGE_PAGE_SHARE', '0.1'))
+
+# Size cap of the compressed markdown cache under MEDIA_ROOT/conversion_cache; 0 disables
+CONVERSION_CACHE_MAX_BYTES = int(os.getenv('CONVERSION_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+# Documents with more chunks than SUMMARY_GROUP_CHUNKS are summarized map-reduce
+# style in groups of that many chunks, within a per-document token budget
+SUMMARY_GROUP_CHUNKS = int(os.getenv('SUMMARY_GROUP_CHUNKS', '6'))
+SUMMARY_TOKEN_BUDGET = int(os.getenv('SUMMARY_TOKEN_BUDGET', '24000'))
+
+# Lines at the top or bottom of a page that repeat on at least this share of
+# pages are removed as headers/footers before chunking; 0 disables
+BOILERPLATE_MIN_PAGE_SHARE = float(os.getenv('BOILERPLATE_MIN_PAGE_SHARE', '0.5'))
+
+# Chunks whose estimated Jaccard similarity to an existing chunk reaches this
+# value reuse that chunk's vector instead of being embedded; 0 disables
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.9'))
+
+# How chunk rows and vectors are written: "copy" streams them with Postgres COPY,
+# "orm" uses bulk_create/bulk_update
+CHUNK_WRITE_METHOD = os.getenv('CHUNK_WRITE_METHOD', 'copy')
+
+# Used by "manage.py bulk_ingest_mode off" when rebuilding the HNSW index
+VECTOR_INDEX_MAINTENANCE_WORK_MEM = os.getenv('VECTOR_INDEX_MAINTENANCE_WORK_MEM', '2GB')
+VECTOR_INDEX_PARALLEL_WORKERS = int(os.getenv('VECTOR_INDEX_PARALLEL_WORKERS', '4'))
+
+# Each pipeline stage has its own queue so CPU-heavy conversions never hold up
+# the Ollama-bound stages; run a worker per queue with "manage.py runcelery --stage"
+EXTRACTION_QUEUE = os.getenv('EXTRACTION_QUEUE', 'extraction')
+EMBEDDING_QUEUE = os.getenv('EMBEDDING_QUEUE', 'embedding')
+SUMMARY_QUEUE = os.getenv('SUMMARY_QUEUE', 'summary')
+CELERY_TASK_ROUTES = {
+    'app.tasks.tasks.save_chunks_task': {'queue': EXTRACTION_QUEUE},
+    'app.tasks.tasks.clone_document_task': {'queue': EMBEDDING_QUEUE},
+    'app.tasks.tasks.embed_text_task': {'queue': EMBEDDING_QUEUE},
+    'app.tasks.tasks.flush_embedding_batches_task': {'queue': EMBEDDING_QUEUE},
+    'app.tasks.tasks.generate_summary_task': {'queue': SUMMARY_QUEUE},
+    'app.tasks.tasks.summarize_chunk_group_task': {'queue': SUMMARY_QUEUE},
+    'app.tasks.tasks.reduce_summaries_task': {'queue': SUMMARY_QUEUE},
+    'app.tasks.tasks.summary_failed_task': {'queue': SUMMARY_QUEUE},
+}
+
+# Extraction workers use an autoscaled prefork pool of at most this many
+# processes; a child is replaced after a task once its resident memory exceeds
+# EXTRACTION_WORKER_MAX_MEMORY_PER_CHILD KiB
+EXTRACTION_WORKER_CONCURRENCY = int(os.getenv('EXTRACTION_WORKER_CONCURRENCY', '2'))
+EXTRACTION_WORKER_MAX_MEMORY_PER_CHILD = int(os.getenv('EXTRACTION_WORKER_MAX_MEMORY_PER_CHILD', str(6 * 1024 ** 2)))
+
+# Embedding and summary workers mostly wait on Ollama and use a thread pool
+EMBEDDING_WORKER_CONCURRENCY = int(os.getenv('EMBEDDING_WORKER_CONCURRENCY', '16'))
+SUMMARY_WORKER_CONCURRENCY = int(os.getenv('SUMMARY_WORKER_CONCURRENCY', '8'))
+
+# Uploads are prioritized by their estimated processing cost in seconds:
+# PIPELINE_BASE_SECONDS plus a per-page cost that depends on the converter.
+# Costs below each threshold get Celery priority 0, 3 and 6, the rest 9.
+PIPELINE_BASE_SECONDS = float(os.getenv('PIPELINE_BASE_SECONDS', '15'))
+MARKER_SECONDS_PER_PAGE = float(os.getenv('MARKER_SECONDS_PER_PAGE', '2'))
+MARKITDOWN_SECONDS_PER_PAGE = float(os.getenv('MARKITDOWN_SECONDS_PER_PAGE', '0.2'))
+PRIORITY_COST_THRESHOLDS = [int(value) for value in os.getenv('PRIORITY_COST_THRESHOLDS', '60,600,3600').split(',')]
+
+# Redis emulates priorities with one list per priority level, which workers
+# drain in order; prefetching a single task keeps a long job from reserving
+# small ones behind it
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+    'sep': ':',
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Calls to Ollama from the web and Celery processes share per-model slots
+# through Redis, served interactive first, then embeddings, then summaries.
+# OLLAMA_MODEL_CONCURRENCY is a comma-separated list of model=limit pairs.
+OLLAMA_SCHEDULER_ENABLED = os.getenv('OLLAMA_SCHEDULER_ENABLED', 'true').lower() == 'true'
+OLLAMA_DEFAULT_CONCURRENCY = int(os.getenv('OLLAMA_DEFAULT_CONCURRENCY', '1'))
+OLLAMA_MODEL_CONCURRENCY = {
+    model: int(limit)
+    for model, limit in (
+        item.split('=') for item in os.getenv('OLLAMA_MODEL_CONCURRENCY', 'bge-m3=2,tinyllama=1').split(',') if item
+    )
+}
+# A slot is released after this many seconds even if its holder never returns it
+OLLAMA_LEASE_SECONDS = int(os.getenv('OLLAMA_LEASE_SECONDS', '600'))
+OLLAMA_WAIT_TIMEOUT = int(os.getenv('OLLAMA_WAIT_TIMEOUT', '300'))
+
+# Each pipeline stage holds an expiring per-document lease in Redis, so a
+# duplicate pipeline skips stages that are already running. A heartbeat thread
+# renews it every third of this while the stage runs
+DOCUMENT_LEASE_SECONDS = int(os.getenv('DOCUMENT_LEASE_SECONDS', '900'))
+
+# Workers started with --autoscale size their pool to drain the backlog of
+# their queues within AUTOSCALE_DRAIN_SECONDS, based on measured task durations,
+# without using more memory than MemAvailable minus AUTOSCALE_MEMORY_RESERVE_MB.
+# Only the prefork extraction workers autoscale; thread pools cannot be resized.
+# Processes are assumed to need AUTOSCALE_PROCESS_MB, or
+# AUTOSCALE_MARKER_PROCESS_MB on extraction workers, unless measured bigger.
+CELERY_WORKER_AUTOSCALER = 'inteldocs.autoscale:QueueDepthAutoscaler'
+AUTOSCALE_INTERVAL = int(os.getenv('AUTOSCALE_INTERVAL', '5'))
+AUTOSCALE_DRAIN_SECONDS = int(os.getenv('AUTOSCALE_DRAIN_SECONDS', '300'))
+AUTOSCALE_MEMORY_RESERVE_MB = int(os.getenv('AUTOSCALE_MEMORY_RESERVE_MB', '1024'))
+AUTOSCALE_PROCESS_MB = int(os.getenv('AUTOSCALE_PROCESS_MB', '512'))
+AUTOSCALE_MARKER_PROCESS_MB = int(os.getenv('AUTOSCALE_MARKER_PROCESS_MB', '4096'))
@@ -33,7 +33,7 @@ export function ConverterModal({
   onUpload,
   isUploading,
 }: ConverterModalProps) {
-  const [selectedConverter, setSelectedConverter] = useState<string>("marker");
+  const [selectedConverter, setSelectedConverter] = useState<string>("auto");
   const [selectedFiles, setSelectedFiles] = useState<File[]>([]);
 
   const onDrop = useCallback((acceptedFiles: File[]) => {
@@ -82,6 +82,9 @@ export function ConverterModal({
                 <SelectValue placeholder="Select markdown converter" />
               </SelectTrigger>
               <SelectContent className="bg-slate-800 border border-white/10">
+                <SelectItem className="text-white" value="auto">
+                  Auto
+                </SelectItem>
                 <SelectItem className="text-white" value="marker">
                   Marker
                 </SelectItem>
@@ -5,6 +5,7 @@
 //     GENERATING_SUMMARY = "generating_summary"
 //     SUMMARY_GENERATED = "summary_generated"
 //     EMBEDDING_TEXT = "embedding_text"
+//     EMBEDDING_QUEUED = "embedding_queued"
 //     EMBEDDED_TEXT = "embedded_text"
 //     COMPLETED = "completed"
 
@@ -15,6 +16,7 @@ export enum DocumentStatus {
   GENERATING_SUMMARY = "generating_summary",
   SUMMARY_GENERATED = "summary_generated",
   EMBEDDING_TEXT = "embedding_text",
+  EMBEDDING_QUEUED = "embedding_queued",
   EMBEDDED_TEXT = "embedded_text",
   COMPLETED = "completed",
 }
@@ -26,6 +28,7 @@ export const DocumentStatusLabel = {
   [DocumentStatus.GENERATING_SUMMARY]: "Generating Summary",
   [DocumentStatus.SUMMARY_GENERATED]: "Summary Generated",
   [DocumentStatus.EMBEDDING_TEXT]: "Embedding Text",
+  [DocumentStatus.EMBEDDING_QUEUED]: "Embedding Queued",
   [DocumentStatus.EMBEDDED_TEXT]: "Embedded Text",
   [DocumentStatus.COMPLETED]: "Completed",
 };
@@ -37,6 +40,7 @@ export const DocumentStatusProgress = {
   [DocumentStatus.GENERATING_SUMMARY]: 50,
   [DocumentStatus.SUMMARY_GENERATED]: 70,
   [DocumentStatus.EMBEDDING_TEXT]: 80,
+  [DocumentStatus.EMBEDDING_QUEUED]: 85,
   [DocumentStatus.EMBEDDED_TEXT]: 90,
   [DocumentStatus.COMPLETED]: 100,
 };
@@ -72,6 +76,11 @@ export const DocumentStatusColor = {
     bg: "bg-blue-500/20",
     border: "border-blue-500/20",
   },
+  [DocumentStatus.EMBEDDING_QUEUED]: {
+    text: "text-blue-400",
+    bg: "bg-blue-500/20",
+    border: "border-blue-500/20",
+  },
   [DocumentStatus.EMBEDDED_TEXT]: {
     text: "text-blue-400",
     bg: "bg-blue-500/20",